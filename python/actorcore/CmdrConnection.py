@@ -18,13 +18,19 @@ import opscore.actor.keyvar as opsKeyvar
 
 
 class CmdrConnection(LineReceiver):
-    def __init__(self, readCallback, brains, logger=None, **argv):
+    def __init__(self, readCallback, brains, logger=None, readBatchCallback=None, **argv):
         """ The Commander twisted Protocol: sends command lines and passes on replies. 
+
+        If readBatchCallback is set, all the complete reply lines in each chunk of
+        received data are passed to it in a single call instead of one by one to
+        readCallback.
         """
 
         self.MAX_LENGTH = 64 * 1024
         self.delimiter = b'\n'
         self.readCallback = readCallback
+        self.readBatchCallback = readBatchCallback
+        self._replyBuffer = b''
         self.brains = brains
         self.lock = threading.Lock()
         self.logger = logger if logger else logging.getLogger('cmdr')
@@ -50,6 +56,41 @@ class CmdrConnection(LineReceiver):
             self.logger.debug("transporting command %s" % (cmdStr))
             self.transport.write(bytes(cmdStr, 'latin-1'))
 
+    def dataReceived(self, data):
+        """ Split received data into reply lines and pass them on as one batch.
+
+        Any trailing partial line is kept until the rest of it arrives.
+        """
+        if self.readBatchCallback is None:
+            return LineReceiver.dataReceived(self, data)
+
+        lines = (self._replyBuffer + data).split(self.delimiter)
+        self._replyBuffer = lines.pop()
+        if lines and max(map(len, lines)) > self.MAX_LENGTH:
+            # As LineReceiver does, pass on the lines before the first over-long one,
+            # then hand that line and everything after it to lineLengthExceeded.
+            index = next(i for i, line in enumerate(lines) if len(line) > self.MAX_LENGTH)
+            exceeded = self.delimiter.join(lines[index:] + [self._replyBuffer])
+            self._replyBuffer = b''
+            self._passBatch(lines[:index])
+            return self.lineLengthExceeded(exceeded)
+        if len(self._replyBuffer) > self.MAX_LENGTH:
+            line, self._replyBuffer = self._replyBuffer, b''
+            self._passBatch(lines)
+            return self.lineLengthExceeded(line)
+        self._passBatch(lines)
+
+    def _passBatch(self, lines):
+        """ Decode complete reply lines and pass them to readBatchCallback. """
+        if not lines:
+            return
+
+        replyStrList = [line.decode('latin-1') for line in lines]
+        if self.logger.isEnabledFor(logging.DEBUG):
+            for replyStr in replyStrList:
+                self.logger.debug('read: ' + replyStr)
+        self.readBatchCallback(self.transport, replyStrList)
+
     def lineReceived(self, replyStr):
         """ Incorporate an entire reply line.
 
@@ -67,6 +108,7 @@ class CmdrConnector(ReconnectingClientFactory):
         self.cmdr = name
         self.brains = brains
         self.readCallback = None
+        self.readBatchCallback = None
         self.stateCallback = None
 
         self.maxDelay = 60
@@ -90,7 +132,8 @@ class CmdrConnector(ReconnectingClientFactory):
         assert (self.readCallback is not None), "readCallback has not yet been set!"
 
         self.resetDelay()
-        proto = CmdrConnection(self.readCallback, brains=self.brains, logger=self.logger)
+        proto = CmdrConnection(self.readCallback, brains=self.brains, logger=self.logger,
+                               readBatchCallback=self.readBatchCallback)
         proto.factory = self
         self.activeConnection = proto
         self.stateCallback(self)
@@ -120,6 +163,9 @@ class CmdrConnector(ReconnectingClientFactory):
     def addReadCallback(self, readCallback):
         self.readCallback = readCallback
 
+    def addReadBatchCallback(self, readBatchCallback):
+        self.readBatchCallback = readBatchCallback
+
     def addStateCallback(self, stateCallback):
         self.stateCallback = stateCallback
 
@@ -194,6 +194,16 @@ class CmdKeyVarDispatcher(keydispatcher.KeyVarDispatcher):
 
         # cmdDict keys are command ID and values are KeyCommands
         self.cmdDict = dict()
+
+        # while dispatching a batch of replies (dispatchReplyStrBatch): a list of
+        # consecutive replies to _batchCmdVar that have not yet been handed to it; None otherwise
+        self._batchReplyList = None
+        self._batchCmdVar = None
+
+        # the most recent reply passed to replyIsMine and the result;
+        # CmdVars watching several keyVars ask about the same reply repeatedly
+        self._isMineReply = None
+        self._isMineResult = False
         
         # refreshCmdDict contains information about keyVar refresh commands:
         # key is: actor, refresh command, e.g. as returned by keyVar.refreshInfo
@@ -214,6 +224,8 @@ class CmdKeyVarDispatcher(keydispatcher.KeyVarDispatcher):
         if connection:
             self.connection = connection
             self.connection.addReadCallback(self._readCallback)
+            if hasattr(self.connection, "addReadBatchCallback"):
+                self.connection.addReadBatchCallback(self._readBatchCallback)
             self.connection.addStateCallback(self.updConnState)
         else:
             self.connection = NullConnection()
@@ -288,6 +300,31 @@ class CmdKeyVarDispatcher(keydispatcher.KeyVarDispatcher):
             if self._isConnected:
                 self._refreshAllTimer.start(_ShortInterval, self.refreshAllVar, resetAll=False)
 
+    def addKeyVars(self, keyVarList):
+        """Add a collection of keyword variables (opscore.actor.keyvar.KeyVar).
+
+        Equivalent to calling addKeyVar for each keyVar, but faster for many keyVars.
+        
+        Inputs:
+        - keyVarList: a collection of keyword variables (opscore.actor.keyvar.KeyVar)
+        """
+        keyVarList = list(keyVarList)
+        keydispatcher.KeyVarDispatcher.addKeyVars(self, keyVarList)
+        refreshCmdDict = self.refreshCmdDict
+        needRefresh = False
+        for keyVar in keyVarList:
+            if not keyVar.hasRefreshCmd:
+                continue
+            refreshInfo = keyVar.refreshInfo
+            keyVarSet = refreshCmdDict.get(refreshInfo)
+            if keyVarSet:
+                keyVarSet.add(keyVar)
+            else:
+                refreshCmdDict[refreshInfo] = set((keyVar,))
+            needRefresh = True
+        if needRefresh and self._isConnected:
+            self._refreshAllTimer.start(_ShortInterval, self.refreshAllVar, resetAll=False)
+
     def checkCmdTimeouts(self):
         """Check all pending commands for timeouts"""
 #       print "opscore.actor.CmdKeyVarDispatcher.checkCmdTimeouts()"
@@ -313,6 +350,16 @@ class CmdKeyVarDispatcher(keydispatcher.KeyVarDispatcher):
          - keywords: an ordered dictionary of message keywords (opscore.protocols.messages.Keywords)        
         Refer to https://trac.sdss3.org/wiki/Ops/Protocols for details.
         """
+        batchReplyList = self._batchReplyList
+        if batchReplyList is not None:
+            # replies dispatched by callbacks while this one is handled are not batched
+            self._batchReplyList = None
+            try:
+                self._dispatchBatchReply(reply, batchReplyList)
+            finally:
+                self._batchReplyList = batchReplyList
+            return
+
         # log message and set KeyVars
         keydispatcher.KeyVarDispatcher.dispatchReply(self, reply, doCallbacks=self._enableCallbacks)
 
@@ -323,7 +370,22 @@ class CmdKeyVarDispatcher(keydispatcher.KeyVarDispatcher):
             if cmdVar != None:
                 # send reply but don't log (that's already been done)
                 self._replyToCmdVar(cmdVar, reply, doLog=False)
-                
+
+    def dispatchReplyStrBatch(self, replyStrList):
+        """Read, parse and dispatch a sequence of messages from the hub.
+
+        Like KeyVarDispatcher.dispatchReplyStrBatch, except that consecutive replies to one
+        of my commands are passed to that command in one call (CmdVar.handleReplies).
+        Command callbacks see the same KeyVar values, in the same order, as they would
+        if each reply was dispatched by itself: pending replies are handed over before
+        a later reply sets any KeyVar, before a reply to a different command,
+        and as soon as the command is done.
+        
+        Callbacks for KeyVars with groupCallbacks set are issued last,
+        after all command callbacks for the batch.
+        """
+        keydispatcher.KeyVarDispatcher.dispatchReplyStrBatch(self, replyStrList)
+
     def executeCmd(self, cmdVar):
         """Execute a command (of type opscore.actor.keyvar.CmdVar).
         
@@ -459,9 +521,13 @@ class CmdKeyVarDispatcher(keydispatcher.KeyVarDispatcher):
         self._allRefreshCmdsSent = False
         
         if resetAll:
-            for keyVarList in list(self.keyVarListDict.values()):
-                for keyVar in keyVarList:
-                    keyVar.setNotCurrent()
+            allKeyVars = [keyVar for keyVarList in self.keyVarListDict.values() for keyVar in keyVarList]
+            # mark every keyVar not current before issuing any callbacks,
+            # so callbacks see the final state rather than a partially reset one
+            for keyVar in allKeyVars:
+                keyVar.setNotCurrent(doCallbacks=False)
+            for keyVar in allKeyVars:
+                keyVar.doCallbacks()
     
         self._sendNextRefreshCmd()
 
@@ -489,8 +555,14 @@ class CmdKeyVarDispatcher(keydispatcher.KeyVarDispatcher):
     def replyIsMine(self, reply):
         """Return True if I am the commander for this message.
         """
-        return reply.header.cmdrName.endswith(self.connection.cmdr) \
-            and reply.header.cmdrName[-len(self.connection.cmdr) - 1: -len(self.connection.cmdr)] in ("", ".")
+        if reply is self._isMineReply:
+            return self._isMineResult
+        cmdr = self.connection.cmdr
+        cmdrName = reply.header.cmdrName
+        isMine = cmdrName.endswith(cmdr) and cmdrName[-len(cmdr) - 1: -len(cmdr)] in ("", ".")
+        self._isMineReply = reply
+        self._isMineResult = isMine
+        return isMine
 
     def sendAllKeyVarCallbacks(self, includeNotCurrent=False):
         """Send all keyVar callbacks.
@@ -594,6 +666,10 @@ class CmdKeyVarDispatcher(keydispatcher.KeyVarDispatcher):
         self.readUnixTime = time.time()
         self.dispatchReplyStr(data)
 
+    def _readBatchCallback(self, sock, dataList):
+        self.readUnixTime = time.time()
+        self.dispatchReplyStrBatch(dataList)
+
     def _refreshCmdCallback(self, refreshCmd):
         """Refresh command callback; complain if command failed or some keyVars not updated
         """
@@ -643,6 +719,94 @@ class CmdKeyVarDispatcher(keydispatcher.KeyVarDispatcher):
         if doLog:
             self.logReply(reply)
         cmdVar.handleReply(reply)
+        self._removeDoneCmdVar(cmdVar)
+
+    def _dispatchReplyStrList(self, replyStrList):
+        """Read, parse and dispatch a sequence of messages from the hub; the guts of dispatchReplyStrBatch.
+
+        Pass all replies to my commands on to them before returning.
+        """
+        prevReplyList = self._batchReplyList
+        prevCmdVar = self._batchCmdVar
+        batchReplyList = []
+        self._batchReplyList = batchReplyList
+        self._batchCmdVar = None
+        try:
+            keydispatcher.KeyVarDispatcher._dispatchReplyStrList(self, replyStrList)
+            self._batchReplyList = None
+            self._flushBatchReplies(batchReplyList)
+        finally:
+            self._batchReplyList = prevReplyList
+            self._batchCmdVar = prevCmdVar
+
+    def _dispatchBatchReply(self, reply, batchReplyList):
+        """Log the reply and set KeyVars, and queue it for its command; the guts of dispatchReply
+        while dispatching a batch.
+
+        Inputs:
+        - reply             parsed Reply object (opscore.protocols.messages.Reply)
+        - batchReplyList    list of pending replies to self._batchCmdVar
+        """
+        if batchReplyList and self._replySetsKeyVars(reply):
+            # the command must see the KeyVars as they were when its replies arrived
+            self._flushBatchReplies(batchReplyList)
+
+        # log message and set KeyVars
+        keydispatcher.KeyVarDispatcher.dispatchReply(self, reply, doCallbacks=self._enableCallbacks)
+
+        if not self.replyIsMine(reply):
+            return
+        cmdVar = self.cmdDict.get(reply.header.commandId, None)
+        if cmdVar is None:
+            return
+        if cmdVar is not self._batchCmdVar:
+            self._flushBatchReplies(batchReplyList)
+            self._batchCmdVar = cmdVar
+        batchReplyList.append(reply)
+        if str(reply.header.code) in keyvar.DoneCodes:
+            # hand over now, so the finished command is removed before any later replies
+            self._flushBatchReplies(batchReplyList)
+
+    def _flushBatchReplies(self, batchReplyList):
+        """Pass the pending replies in batchReplyList to self._batchCmdVar and empty the list.
+        """
+        if not batchReplyList:
+            return
+        cmdVar = self._batchCmdVar
+        replyList = batchReplyList[:]
+        del batchReplyList[:]
+        self._batchCmdVar = None
+        try:
+            self._repliesToCmdVar(cmdVar, replyList)
+        except Exception:
+            sys.stderr.write("Could not dispatch replies=%r\n    to command %s\n" % (replyList, cmdVar))
+            traceback.print_exc(file=sys.stderr)
+
+    def _replySetsKeyVars(self, reply):
+        """Return True if reply has a keyword for any of my KeyVars.
+        """
+        actor = reply.header.actorLower
+        getKeyVarList = self.keyVarListDict.get
+        for keyword in reply.keywords:
+            if getKeyVarList((actor, keyword.lowerName)):
+                return True
+        return False
+
+    def _repliesToCmdVar(self, cmdVar, replyList):
+        """Send a sequence of already logged messages to a command variable.
+
+        If the command is done, delete it from the command dict.
+
+        Inputs:
+        - cmdVar    command variable (opscore.actor.keyvar.CmdVar)
+        - replyList list of Reply objects (opscore.protocols.messages.Reply) to send
+        """
+        cmdVar.handleReplies(replyList)
+        self._removeDoneCmdVar(cmdVar)
+
+    def _removeDoneCmdVar(self, cmdVar):
+        """If the command is done, delete it from the command dict.
+        """
         if cmdVar.isDone and cmdVar.cmdID != None:
             try:
                 del (self.cmdDict[cmdVar.cmdID])
@@ -33,6 +33,11 @@ import RO.StringUtil
 
 __all__ = ["logToStdOut", "KeyVarDispatcher"]
 
+# bind frequently used lookups once, rather than on every reply
+_MsgCodeSeverity = keyvar.MsgCodeSeverity
+_sevError = RO.Constants.sevError
+_sevNormal = RO.Constants.sevNormal
+
 
 def logToStdOut(msgStr, *dumArgs, **dumKeyArgs):
     print(msgStr)
@@ -68,6 +73,11 @@ class KeyVarDispatcher(object):
         # set of actors for which loadActorDictionary has been called
         self.loadedActors = set()
 
+        # while dispatching a batch of replies (dispatchReplyStrBatch): KeyVars with groupCallbacks
+        # whose callbacks are due at the end of the batch, as an insertion-ordered dict of keyVar: None;
+        # None otherwise
+        self._dirtyKeyVars = None
+
         self.setLogFunc(logFunc)        
     
     def addKeyVar(self, keyVar):
@@ -84,6 +94,19 @@ class KeyVarDispatcher(object):
         # append new keyVar to the list
         keyList.append(keyVar)
 
+    def addKeyVars(self, keyVarList):
+        """Add a collection of keyword variables (opscore.actor.keyvar.KeyVar).
+
+        Equivalent to calling addKeyVar for each keyVar, but faster for many keyVars.
+        
+        Inputs:
+        - keyVarList: a collection of keyword variables (opscore.actor.keyvar.KeyVar)
+        """
+        makeDictKey = self._makeDictKey
+        setdefault = self.keyVarListDict.setdefault
+        for keyVar in keyVarList:
+            setdefault(makeDictKey(keyVar.actor, keyVar.name), []).append(keyVar)
+
     def dispatchReply(self, reply, doCallbacks=True):
         """Log the reply and set KeyVars based on the supplied Reply
         
@@ -112,7 +135,7 @@ class KeyVarDispatcher(object):
         except Exception as e:
             self.logMsg(
                 msgStr = "CouldNotParse; Reply=%r; Text=%r" % (replyStr, RO.StringUtil.strFromException(e)),
-                severity = RO.Constants.sevError,
+                severity = _sevError,
             )
             return
         
@@ -124,6 +147,52 @@ class KeyVarDispatcher(object):
                 (replyStr, reply))
             traceback.print_exc(file=sys.stderr)
 
+    def dispatchReplyStrBatch(self, replyStrList):
+        """Read, parse and dispatch a sequence of messages from the hub.
+        
+        Equivalent to calling dispatchReplyStr for each message, but handles the entire batch
+        in a single call, which reduces per-message overhead when many replies arrive at once.
+        The exception is KeyVars with groupCallbacks set: their callbacks are issued once,
+        after the batch has been dispatched. If this is called while another batch is being
+        dispatched (e.g. by a callback) then the outermost call issues those callbacks.
+        """
+        if self._dirtyKeyVars is not None:
+            self._dispatchReplyStrList(replyStrList)
+            return
+
+        dirtyKeyVars = dict()
+        self._dirtyKeyVars = dirtyKeyVars
+        try:
+            self._dispatchReplyStrList(replyStrList)
+        finally:
+            self._dirtyKeyVars = None
+        for keyVar in dirtyKeyVars:
+            keyVar.doCallbacks()
+
+    def _dispatchReplyStrList(self, replyStrList):
+        """Read, parse and dispatch a sequence of messages from the hub; the guts of dispatchReplyStrBatch.
+        """
+        parse = self.parser.parse
+        dispatchReply = self.dispatchReply
+        for replyStr in replyStrList:
+            # parse message; if that fails, log it as an error
+            try:
+                reply = parse(replyStr)
+            except Exception as e:
+                self.logMsg(
+                    msgStr = "CouldNotParse; Reply=%r; Text=%r" % (replyStr, RO.StringUtil.strFromException(e)),
+                    severity = _sevError,
+                )
+                continue
+
+            # dispatch message
+            try:
+                dispatchReply(reply)
+            except Exception as e:
+                sys.stderr.write("Could not dispatch replyStr=%r\n    which was parsed as reply=%r\n" % \
+                    (replyStr, reply))
+                traceback.print_exc(file=sys.stderr)
+
     def getKeyVarList(self, actor, keyName):
         """Return the list of KeyVars by this name and actor; return [] if no match.
         
@@ -146,7 +215,7 @@ class KeyVarDispatcher(object):
 
     def logMsg(self,
         msgStr,
-        severity = RO.Constants.sevNormal,
+        severity = _sevNormal,
         actor = None,
         cmdr = None,
         cmdID = 0,
@@ -214,7 +283,7 @@ class KeyVarDispatcher(object):
         """
         try:
             msgCode = reply.header.code
-            severity = keyvar.MsgCodeSeverity[msgCode]
+            severity = _MsgCodeSeverity[msgCode]
             self.logMsg(
                 msgStr = reply.string,
                 severity = severity,
@@ -261,22 +330,27 @@ class KeyVarDispatcher(object):
         Refer to https://trac.sdss3.org/wiki/Ops/Protocols for details.
         """
 #         print "dispatchReply(reply=%s, doCallbacks=%s)" % (reply, doCallbacks)
-        actor = reply.header.actor.lower()
-        if actor.startswith("keys_"):
-            # data is from the hub's keyword cache
-            actor = actor[5:]
-            isGenuine = False
-        else:
-            isGenuine = True
+        # the parser strips the "keys_" prefix from data that is from the hub's keyword cache
+        actor = reply.header.actorLower
+        isGenuine = reply.header.isGenuine
+        # actor is already lowercase, so look up keyVarListDict directly instead of using getKeyVarList
+        getKeyVarList = self.keyVarListDict.get
+        dirtyKeyVars = self._dirtyKeyVars if doCallbacks else None
         for keyword in reply.keywords:
-            keyVarList = self.getKeyVarList(actor, keyword.name)
+            keyVarList = getKeyVarList((actor, keyword.lowerName))
+            if not keyVarList:
+                continue
             for keyVar in keyVarList:
                 try:
+                    if dirtyKeyVars is not None and keyVar.groupCallbacks:
+                        keyVar.set(keyword.values, isGenuine=isGenuine, reply=reply, doCallbacks=False)
+                        dirtyKeyVars[keyVar] = None
+                        continue
                     keyVar.set(keyword.values, isGenuine=isGenuine, reply=reply, doCallbacks=doCallbacks)
                 except TypeError:
                     self.logMsg(
                         "InvalidKeywordData=%s.%s, %s" % (actor, keyword.name, keyword.values),
-                        severity = RO.Constants.sevError,
+                        severity = _sevError,
                         fallbackToStdOut = True,
                     )
                 except:
@@ -20,8 +20,9 @@ History:
 2010-11-19 ROwen    Bug fix: added CmdVar to __all__.
 """
 from builtins import zip
-from builtins import range
 from builtins import object
+import collections
+import functools
 import sys
 import time
 import traceback
@@ -36,18 +37,39 @@ AllCodes = "IWE:F!>D"
 DoneCodes = ":F!"
 FailedCodes = "F!"
 
+# sets of the above, for fast membership tests
+_DoneCodeSet = frozenset(DoneCodes)
+_FailedCodeSet = frozenset(FailedCodes)
+
+# severities, bound once for use below
+_sevDebug = RO.Constants.sevDebug
+_sevNormal = RO.Constants.sevNormal
+_sevWarning = RO.Constants.sevWarning
+_sevError = RO.Constants.sevError
+
 # MsgCodeSeverity a dictionary of: message code: associated severity
 MsgCodeSeverity = {
-    "D": RO.Constants.sevDebug, # debug
-    "I": RO.Constants.sevNormal, # information
-    ">": RO.Constants.sevNormal, # command queued
-    ":": RO.Constants.sevNormal, # command finished
-    "W": RO.Constants.sevWarning, # warning
-    "E": RO.Constants.sevError, # error
-    "F": RO.Constants.sevError, # command failed
-    "!": RO.Constants.sevError, # command failed and actor is in trouble
+    "D": _sevDebug, # debug
+    "I": _sevNormal, # information
+    ">": _sevNormal, # command queued
+    ":": _sevNormal, # command finished
+    "W": _sevWarning, # warning
+    "E": _sevError, # error
+    "F": _sevError, # command failed
+    "!": _sevError, # command failed and actor is in trouble
 }
 
+# MsgCodeSeverity as a list indexed by ord(message code), for fast lookup;
+# unknown codes have normal severity
+_SeverityByOrd = [_sevNormal] * 128
+for _msgCode, _severity in MsgCodeSeverity.items():
+    _SeverityByOrd[ord(_msgCode)] = _severity
+    _SeverityByOrd[ord(_msgCode.lower())] = _severity
+del _msgCode, _severity
+
+# time.time bound once, for KeyVar.set
+_now = time.time
+
 class KeyVar(RO.AddCallback.BaseMixin):
     """Container for keyword data.
     
@@ -55,31 +77,48 @@ class KeyVar(RO.AddCallback.BaseMixin):
     
     Callback functions receive one argument: this object
     """
-    def __init__(self, actor, key, doPrint=False):
+    # slots make the attribute writes in set fixed-offset stores;
+    # RO.AddCallback.BaseMixin has no __slots__, so instances still have a __dict__
+    __slots__ = ("actor", "name", "reply", "key", "_typedValues", "doPrint", "valueList",
+        "_isCurrent", "_isGenuine", "_timeStamp", "refreshActor", "_refreshCmd", "hasRefreshCmd", "_getValueImpl", "groupCallbacks",
+        "_defCallNow", "_callbacks", "_enableCallbacks")
+
+    def __init__(self, actor, key, doPrint=False, groupCallbacks=False):
         """Create a KeyVar.
         
         Inputs are:
         - actor: the name of the actor issuing this keyword (string)
         - key: keyword description (opscore.protocols.keys.Key)
         - doPrint: do print data to stdout when set successfully (for debugging)? (boolean)
-        """
-        self.actor = actor
-        self.name = key.name
+        - groupCallbacks: if True then when the dispatcher sets this KeyVar more than once
+            while dispatching a batch of replies, callbacks are issued once, after the batch,
+            with the final value. Only use this if the callbacks only care about the latest value
+            (e.g. widgets); CmdVars record every value and need the default of False.
+        """
+        # a dispatcher holds many KeyVars for each actor, so share one copy of each name
+        self.actor = sys.intern(str(actor))
+        self.name = sys.intern(str(key.name))
         self.reply = None
         self.key = key
         self._typedValues = key.typedValues
         self.doPrint = bool(doPrint)
+        self.groupCallbacks = bool(groupCallbacks)
         self.valueList = (None,)*self.minVals
+        # the number of values is fixed for the life of the KeyVar, so choose how getValue works now
+        if self.maxVals == 0:
+            self._getValueImpl = _getValueTrue
+        elif (self.maxVals == 1) and (self.minVals == 1):
+            self._getValueImpl = _getValueScalar
+        else:
+            self._getValueImpl = _getValueTuple
         self._isCurrent = False
         self._isGenuine = False
         self._timeStamp = 0
         if self.key.refreshCmd:
-            self.refreshActor = self.actor
-            self.refreshCmd = key.refreshCmd
+            self.setRefreshInfo(self.actor, key.refreshCmd)
         else:
             # have the model set this to a keys command later if not keys.doCache
-            self.refreshActor = None
-            self.refreshCmd = None
+            self.setRefreshInfo(None, None)
         RO.AddCallback.BaseMixin.__init__(self, defCallNow = True)
     
     def __repr__(self):
@@ -131,15 +170,10 @@ class KeyVar(RO.AddCallback.BaseMixin):
         """
         RO.MathUtil.checkRange(ind, 0, self.maxVals, "%s ind" % (self,))
         
-        if not cnvFunc:
-            cnvFunc = lambda x: x
-                
-        def adapterFunc(keyVar, callFunc=callFunc, ind=ind, cnvFunc=cnvFunc):
-            try:
-                val = keyVar.valueList[ind]
-            except IndexError:
-                return
-            callFunc(cnvFunc(val), isCurrent=keyVar.isCurrent, keyVar=keyVar)
+        if cnvFunc:
+            adapterFunc = functools.partial(_valueAdapter, callFunc, ind, cnvFunc)
+        else:
+            adapterFunc = functools.partial(_valueAdapterNoCnv, callFunc, ind)
         self.addCallback(adapterFunc, callNow)
 
     def addValueListCallback(self, callFuncList, startInd=0, cnvFunc=None, callNow=True):
@@ -167,34 +201,66 @@ class KeyVar(RO.AddCallback.BaseMixin):
         RO.MathUtil.checkRange(startInd, 0, None, "%s startInd" % (self,))
         RO.MathUtil.checkRange(endInd, None, self.maxVals, "%s end index" % (self,))
         
-        if not cnvFunc:
-            cnvFunc = lambda x: x
-                
-        def adapterFunc(keyVar, callFuncList=callFuncList, startInd=startInd, cnvFunc=cnvFunc):
-            for ind, callFunc in enumerate(callFuncList[startInd:]):
-                try:
-                    val = keyVar.valueList[ind]
-                except IndexError:
-                    return
-                callFunc(cnvFunc(val), isCurrent=keyVar.isCurrent, keyVar=keyVar)
+        callFuncList = tuple(callFuncList)
+        if cnvFunc:
+            adapterFunc = functools.partial(_valueListAdapter, callFuncList, startInd, cnvFunc)
+        else:
+            adapterFunc = functools.partial(_valueListAdapterNoCnv, callFuncList, startInd)
         self.addCallback(adapterFunc, callNow)
     
+    def _basicDoCallbacks(self, *args, **kwargs):
+        """Execute the callbacks, passing *args and **kwargs to the callback functions.
+
+        If callbacks are already being executed then this function is a no-op.
+
+        This is a faster version of RO.AddCallback.BaseMixin._basicDoCallbacks
+        for the KeyVar hot path: it returns at once if there are no callbacks
+        and calls each function directly, only formatting a description
+        of this KeyVar if a callback fails.
+        """
+        if not self._callbacks or not self._enableCallbacks:
+            return
+
+        try:
+            self._enableCallbacks = False
+            for func in tuple(self._callbacks):
+                try:
+                    func(*args, **kwargs)
+                except Exception as e:
+                    sys.stderr.write("%s %s(*%s, **%s) failed: %s\n" % (self, func, args, kwargs, e,))
+                    traceback.print_exc(file=sys.stderr)
+        finally:
+            self._enableCallbacks = True
+
     def doCallbacks(self):
         """Execute callbacks
         """
         self._basicDoCallbacks(self)
 
-    @property
-    def hasRefreshCmd(self):
-        """Return True if has a refresh command.
-        """
-        return bool(self.refreshCmd)
-    
     @property
     def refreshInfo(self):
         """Return refreshActor, refreshCmd"""
         return (self.refreshActor, self.refreshCmd)
 
+    def setRefreshInfo(self, refreshActor, refreshCmd):
+        """Set refreshActor and refreshCmd.
+        """
+        self.refreshActor = refreshActor
+        self.refreshCmd = refreshCmd
+
+    @property
+    def refreshCmd(self):
+        """Return the refresh command, or None if none.
+        """
+        return self._refreshCmd
+
+    @refreshCmd.setter
+    def refreshCmd(self, refreshCmd):
+        """Set the refresh command, keeping hasRefreshCmd (a plain attribute, for fast reads) in sync.
+        """
+        self._refreshCmd = refreshCmd
+        self.hasRefreshCmd = bool(refreshCmd)
+
     @property
     def isCurrent(self):
         """Return True if the client is connected to the hub and if
@@ -236,7 +302,10 @@ class KeyVar(RO.AddCallback.BaseMixin):
         """Set the values, converting from strings as necessary.
 
         Inputs:
-        - valueList: a list of values (strings or converted to proper data type)
+        - valueList: a list of values (strings or converted to proper data type);
+            if valueList is a list (but not a subclass such as the Values of a parsed reply)
+            then it is converted in place rather than copied;
+            if valueList is a tuple of already converted values then it is used as is
         - isCurrent: new value for isCurrent flag (generally leave this at its default of True)
         - isGenuine: set True if data came from the actor, False if it came from a data cache
         - reply: a parsed Reply object (opscore.protocols.messages.Reply)
@@ -244,9 +313,14 @@ class KeyVar(RO.AddCallback.BaseMixin):
         
         @raise TypeError if the values cannot be set.
         """
-        valueList = list(valueList)
-        if not self._typedValues.consume(valueList):
-            raise TypeError("%s invalid valueList=%s" % (self, valueList))
+        if type(valueList) is tuple and not self._typedValues.needsCoercion(valueList):
+            # already converted (e.g. the valueList of another KeyVar); use as is
+            pass
+        else:
+            if type(valueList) is not list:
+                valueList = list(valueList)
+            if not self._typedValues.consume(valueList):
+                raise TypeError("%s invalid valueList=%s" % (self, valueList))
 
         # print to stderr, if requested
         if self.doPrint:
@@ -254,20 +328,25 @@ class KeyVar(RO.AddCallback.BaseMixin):
 
         # apply callbacks, if any
         self.valueList = tuple(valueList)
-        self._timeStamp = time.time()
-        self._isCurrent = bool(isCurrent)
-        self._isGenuine = bool(isGenuine)
+        self._timeStamp = _now()
+        # the dispatcher passes actual bools; only coerce other values
+        self._isCurrent = isCurrent if isCurrent.__class__ is bool else bool(isCurrent)
+        self._isGenuine = isGenuine if isGenuine.__class__ is bool else bool(isGenuine)
         self.reply = reply
         if doCallbacks:
             self._basicDoCallbacks(self)
 
-    def setNotCurrent(self):
+    def setNotCurrent(self, doCallbacks=True):
         """Clear the isCurrent flag
         
+        Inputs:
+        - doCallbacks: if True then issue callbacks
+        
         Note: the flag is set automatically when you call "set", so there is no method to set it.
         """
         self._isCurrent = False
-        self._basicDoCallbacks(self)
+        if doCallbacks:
+            self._basicDoCallbacks(self)
      
     def getValue(self, doRaise=True):
         """Return the "value" of the KeyVar, as follows:
@@ -276,18 +355,17 @@ class KeyVar(RO.AddCallback.BaseMixin):
         - return keyVar[0] if keyVar always contains 1 element
         - return keyVar.valueList in all other cases
         """
-        if doRaise and (None in self.valueList):
-            raise ValueError("%s is unknown" % (self,))
-        if self.maxVals == 0:
-            return True
-        if (self.maxVals == 1) and (self.minVals == 1):
-            return self.valueList[0]
-        return self.valueList
+        return self._getValueImpl(self, doRaise)
 
 class CmdVar(object):
     """Issue a command via the dispatcher and receive callbacks
     as replies are received.
     """
+    __slots__ = ("cmdStr", "actor", "cmdID", "timeLim", "description", "isRefresh", "forUserCmd",
+        "_timeLimKeyVar", "_timeLimKeyInd", "abortCmdStr", "keyVars", "keyVarDataDict",
+        "dispatcher", "replyList", "lastCode", "_isDone", "_didFail", "_severity",
+        "startTime", "maxEndTime", "callCodesFuncList", "_codeMap", "__weakref__")
+
     def __init__(self,
         cmdStr = "",
         actor = "",
@@ -301,6 +379,7 @@ class CmdVar(object):
         abortCmdStr = None,
         keyVars = None,
         forUserCmd = None,
+        keyVarDataMaxLen = None,
     ):
         """
         Inputs:
@@ -323,6 +402,9 @@ class CmdVar(object):
         - forUserCmd: this command is being sent due to the specified command from a user.
             forUserCmd must have one attribute: cmdr. The command string sent to the hub
             will start with: <forUsreCmd.cmdr>.<dispatcher.name> instead of <dispatcher.name>.
+        - keyVarDataMaxLen: the maximum number of values to save for each of keyVars (the oldest are discarded);
+            if None (the default) then all values are saved. Use this for commands that run a long time
+            and output their keyVars often, to bound memory use.
         
         Note: timeLim and timeLimKeyInfo work together as follows:
         - The initial time limit for the command is timeLim
@@ -345,19 +427,32 @@ class CmdVar(object):
             RO.MathUtil.checkRange(self._timeLimKeyInd, 0, self._timeLimKeyVar.minVals, "timeLimKeyInd")
         self.abortCmdStr = abortCmdStr
         # a dictionary of keyVar values; keys is keyVar; value is a list of keyVar.valueList seen for that keyVar
+        # (a collections.deque if keyVarDataMaxLen is specified)
         self.keyVars = keyVars or ()
         self.keyVarDataDict = dict()
         for keyVar in self.keyVars:
-            self.keyVarDataDict[keyVar] = []
+            if keyVarDataMaxLen is None:
+                self.keyVarDataDict[keyVar] = []
+            else:
+                self.keyVarDataDict[keyVar] = collections.deque(maxlen=keyVarDataMaxLen)
 
         self.dispatcher = None # set by dispatcher when it executes the command
         self.replyList = []
         self.lastCode = "Information"
+        # isDone and didFail for lastCode; updated by handleReply
+        self._isDone = False
+        self._didFail = False
+        self._severity = _sevNormal
         self.startTime = None
         self.maxEndTime = None
 
         # the following is a list of (callCodes, callFunc)
         self.callCodesFuncList = []
+        # dict of message code: tuple of callback functions for that code, in the order added;
+        # kept in step with callCodesFuncList so handleReply need not scan every callback.
+        # The tuples are replaced, never modified, so handleReply can iterate them without a copy
+        # even if a callback adds or removes callbacks.
+        self._codeMap = dict()
 
         if callFunc:
             self.addCallback(callFunc, callCodes)
@@ -386,22 +481,22 @@ class CmdVar(object):
                 FailedCodes (command failed)
                 AllCodes (all message codes, thus any reply)
         """
-        upCallCodes = callCodes.upper()
+        upCallCodes = frozenset(callCodes.upper())
         self.callCodesFuncList.append((upCallCodes, callFunc))
+        for msgCode in upCallCodes:
+            self._codeMap[msgCode] = self._codeMap.get(msgCode, ()) + (callFunc,)
     
     @property
     def didFail(self):
         """Return True if the command failed, False otherwise.
         """
-        return self.lastCode in FailedCodes
+        return self._didFail
     
     @property
     def severity(self):
         """Return severity of most recent message, or RO.Constants.sevNormal if no messages received.
         """
-        if not self.lastCode:
-            return RO.Constants.sevNormal
-        return TypeDict[self.lastCode][1]
+        return self._severity
     
     def getKeyVarData(self, keyVar):
         """Return a list of data seen for the specified keyword variable, or [] if no data seen.
@@ -411,6 +506,7 @@ class CmdVar(object):
     
         Returns a list of data seen for the specified keyVar that was in response to this command,
         in the order received (oldest to most recent). Each entry is the list of values seen for the keyword.
+        If keyVarDataMaxLen was specified then this is a collections.deque of at most that many entries.
         For example:
             getKeyVarData(keyVar)[-1] is the most recent list of data
                 (or an index error if the keyVar was not seen was seen!)
@@ -447,27 +543,65 @@ class CmdVar(object):
 
         Warn and do nothing else if called after the command has finished.
         """
-        if self.lastCode in DoneCodes:
+        if self._isDone:
             sys.stderr.write("Command %s already finished; no more replies allowed\n" % (self,))
             return
         self.replyList.append(reply)
-        msgCode = reply.header.code
-        self.lastCode = msgCode
-        for callCodes, callFunc in self.callCodesFuncList[:]:
-            if msgCode in callCodes:
+        self.lastCode = reply.header.code
+        # the header code is an Enum, which hashes and compares in Python code;
+        # use the equivalent interned plain str for the lookups below
+        msgCode = sys.intern(str(self.lastCode))
+        self._isDone = msgCode in _DoneCodeSet
+        self._didFail = msgCode in _FailedCodeSet
+        self._severity = _SeverityByOrd[ord(msgCode)] if msgCode else _sevNormal
+        callFuncList = self._codeMap.get(msgCode)
+        if callFuncList:
+            for callFunc in callFuncList:
                 try:
                     callFunc(self)
                 except Exception:
                     sys.stderr.write("%s callback %s failed\n" % (self, callFunc))
                     traceback.print_exc(file=sys.stderr)
-        if self.lastCode in DoneCodes:
+        if self._isDone:
             self._cleanup()
-    
+
+    def handleReplies(self, replyList):
+        """Handle a sequence of replies (opscore.protocols.Reply) from the dispatcher.
+
+        Equivalent to calling handleReply for each reply in turn, but faster for many replies.
+        Replies after the one that finishes the command are ignored, with a single warning.
+        """
+        if self._isDone:
+            sys.stderr.write("Command %s already finished; no more replies allowed\n" % (self,))
+            return
+        appendReply = self.replyList.append
+        codeMap = self._codeMap
+        for reply in replyList:
+            if self._isDone:
+                sys.stderr.write("Command %s already finished; no more replies allowed\n" % (self,))
+                break
+            appendReply(reply)
+            self.lastCode = reply.header.code
+            msgCode = sys.intern(str(self.lastCode))
+            self._isDone = msgCode in _DoneCodeSet
+            self._didFail = msgCode in _FailedCodeSet
+            self._severity = _SeverityByOrd[ord(msgCode)] if msgCode else _sevNormal
+            callFuncList = codeMap.get(msgCode)
+            if callFuncList:
+                for callFunc in callFuncList:
+                    try:
+                        callFunc(self)
+                    except Exception:
+                        sys.stderr.write("%s callback %s failed\n" % (self, callFunc))
+                    traceback.print_exc(file=sys.stderr)
+        if self._isDone:
+            self._cleanup()
+
     @property
     def isDone(self):
         """Return True if the command is finished, False otherwise.
         """
-        return self.lastCode in DoneCodes
+        return self._isDone
 
     @property
     def lastReply(self):
@@ -493,6 +627,10 @@ class CmdVar(object):
         for callCodeFunc in self.callCodesFuncList:
             if callFunc == callCodeFunc[1]:
                 self.callCodesFuncList.remove(callCodeFunc)
+                for msgCode in callCodeFunc[0]:
+                    codeFuncs = self._codeMap[msgCode]
+                    ind = codeFuncs.index(callFunc)
+                    self._codeMap[msgCode] = codeFuncs[:ind] + codeFuncs[ind+1:]
                 return True
         if doRaise:
             raise ValueError("Callback %r not found" % callFunc)
@@ -509,10 +647,12 @@ class CmdVar(object):
             return
 
         newTimeLim = keyVar[self._timeLimKeyInd]
-        try:
-            newTimeLim = float(newTimeLim)
-        except Exception:
-            raise ValueError("Invalid timeout value %r in keyword %s for command %s" % (newTimeLim, keyVar, self))
+        # the value is normally already a number (e.g. a Float), so only convert other values
+        if not isinstance(newTimeLim, (int, float)):
+            try:
+                newTimeLim = float(newTimeLim)
+            except Exception:
+                raise ValueError("Invalid timeout value %r in keyword %s for command %s" % (newTimeLim, keyVar, self))
         self.maxEndTime = time.time() + newTimeLim
         if self.timeLim:
             self.maxEndTime += self.timeLim
@@ -523,6 +663,7 @@ class CmdVar(object):
         This reduces the chance of memory leaks.
         """
         self.callCodesFuncList = []
+        self._codeMap = dict()
         for keyVar in self.keyVars:
             keyVar.removeCallback(self._keyVarCallback, doRaise=False)
         if self._timeLimKeyVar:
@@ -545,27 +686,30 @@ class CmdVar(object):
     def _keyVarIsMine(self, keyVar):
         """Return True if keyVar is in response to this command; False otherwise.
         """
-        if (not keyVar.isCurrent) or (not keyVar.reply):
+        reply = keyVar.reply
+        if (not keyVar._isCurrent) or (not reply):
             return False
-        # note: self.dispatcher should be set, but play it safe
-        if not self.dispatcher or not self.dispatcher.replyIsMine(keyVar.reply):
+        # check the command ID first; it is much cheaper than replyIsMine
+        if reply.header.commandId != self.cmdID:
             return False
-        if keyVar.reply.header.commandId != self.cmdID:
+        # note: self.dispatcher should be set, but play it safe
+        if not self.dispatcher or not self.dispatcher.replyIsMine(reply):
             return False
         return True
 
     def _keyVarCallback(self, keyVar):
         """Keyword seen; archive the data.
         """
-        if not self._keyVarIsMine(keyVar):
+        # this is _keyVarIsMine, inlined because it is called for every update of every watched keyVar;
+        # most updates are for other commands, so check the command ID first
+        reply = keyVar.reply
+        if reply is None or reply.header.commandId != self.cmdID or not keyVar._isCurrent:
+            return
+        # note: self.dispatcher should be set, but play it safe
+        if not self.dispatcher or not self.dispatcher.replyIsMine(reply):
             return
         self.keyVarDataDict[keyVar].append(keyVar.valueList)
     
-    def _keyVarID(self, keyVar):
-        """Return an ID suitable for use in a dictionary.
-        """
-        return id(keyVar)
-    
     def __repr__(self):
         return "%s(cmdID=%r, actor=%r, cmdStr=%r)" % (self.__class__.__name__, self.cmdID, self.actor, self.cmdStr)
     
@@ -573,24 +717,86 @@ class CmdVar(object):
         return "%s %r" % (self.actor, self.cmdStr)
 
 
+def _getValueTrue(keyVar, doRaise):
+    """KeyVar.getValue for a KeyVar that always contains 0 elements.
+    """
+    if doRaise and (None in keyVar.valueList):
+        raise ValueError("%s is unknown" % (keyVar,))
+    return True
+
+def _getValueScalar(keyVar, doRaise):
+    """KeyVar.getValue for a KeyVar that always contains 1 element.
+    """
+    if doRaise and (None in keyVar.valueList):
+        raise ValueError("%s is unknown" % (keyVar,))
+    return keyVar.valueList[0]
+
+def _getValueTuple(keyVar, doRaise):
+    """KeyVar.getValue for all other KeyVars.
+    """
+    if doRaise and (None in keyVar.valueList):
+        raise ValueError("%s is unknown" % (keyVar,))
+    return keyVar.valueList
+
+def _valueAdapter(callFunc, ind, cnvFunc, keyVar):
+    """KeyVar callback for addValueCallback with a conversion function.
+    """
+    try:
+        val = keyVar.valueList[ind]
+    except IndexError:
+        return
+    callFunc(cnvFunc(val), isCurrent=keyVar._isCurrent, keyVar=keyVar)
+
+def _valueAdapterNoCnv(callFunc, ind, keyVar):
+    """KeyVar callback for addValueCallback with no conversion function.
+    """
+    try:
+        val = keyVar.valueList[ind]
+    except IndexError:
+        return
+    callFunc(val, isCurrent=keyVar._isCurrent, keyVar=keyVar)
+
+def _valueListAdapter(callFuncList, startInd, cnvFunc, keyVar):
+    """KeyVar callback for addValueListCallback with a conversion function.
+    
+    callFuncList[i] is called with KeyVar value startInd + i, for each value that is present.
+    """
+    isCurrent = keyVar._isCurrent
+    for callFunc, val in zip(callFuncList, keyVar.valueList[startInd:]):
+        callFunc(cnvFunc(val), isCurrent=isCurrent, keyVar=keyVar)
+
+def _valueListAdapterNoCnv(callFuncList, startInd, keyVar):
+    """KeyVar callback for addValueListCallback with no conversion function.
+    
+    callFuncList[i] is called with KeyVar value startInd + i, for each value that is present.
+    """
+    isCurrent = keyVar._isCurrent
+    for callFunc, val in zip(callFuncList, keyVar.valueList[startInd:]):
+        callFunc(val, isCurrent=isCurrent, keyVar=keyVar)
+
+
 class _SetWdgSet(object):
     """KeyVar callback to set a collection of RO.Wdg widgets.
     """
+    __slots__ = ("wdgSet", "_setters")
+
     def __init__(self, wdgSet):
         self.wdgSet = wdgSet
-        self.wdgInd = list(range(len(wdgSet)))
+        self._setters = tuple(wdg.set for wdg in wdgSet)
     def __call__(self, keyVar):
-        isCurrent = keyVar.isCurrent
-        for wdg, val in zip(self.wdgSet, keyVar.valueList):
-            wdg.set(val, isCurrent=isCurrent, keyVar=keyVar)
+        isCurrent = keyVar._isCurrent
+        for setter, val in zip(self._setters, keyVar.valueList):
+            setter(val, isCurrent=isCurrent, keyVar=keyVar)
 
 class _SetDefaultWdgSet(object):
     """KeyVar callback to set the default of a collection of RO.Wdg widgets.
     """
+    __slots__ = ("wdgSet", "_setters")
+
     def __init__(self, wdgSet):
         self.wdgSet = wdgSet
-        self.wdgInd = list(range(len(wdgSet)))
+        self._setters = tuple(wdg.setDefault for wdg in wdgSet)
     def __call__(self, keyVar):
-        isCurrent = keyVar.isCurrent
-        for wdg, val in zip(self.wdgSet, keyVar.valueList):
-            wdg.setDefault(val, isCurrent=isCurrent, keyVar=keyVar)
+        isCurrent = keyVar._isCurrent
+        for setter, val in zip(self._setters, keyVar.valueList):
+            setter(val, isCurrent=isCurrent, keyVar=keyVar)
@@ -35,7 +35,10 @@ class Model(object):
     dispatcher = None
     def __init__(self, actor):
         #print "%s.__init__(actor=%s)" % (self.__class__.__name__, actor)
-        self._keyNameVarDict = dict()
+        # set directly because __setattr__ uses it;
+        # include any keyVars a subclass set before calling this method
+        self.__dict__["_keyNameVarDict"] = dict((name, value) for name, value in self.__dict__.items()
+            if isinstance(value, keyvar.KeyVar))
         if actor in self._registeredActors:
             raise RuntimeError("%s model already instantiated" % (actor,))
         
@@ -43,36 +46,50 @@ class Model(object):
         if self.dispatcher == None:
             raise RuntimeError("Dispatcher not set")
 
-        cachedKeyVars = []
         keysDict = protoKeys.KeysDictionary.load(actor)
-        for key in keysDict.keys.values():
-            keyVar = keyvar.KeyVar(actor, key)
-            if key.doCache and not keyVar.hasRefreshCmd:
-                cachedKeyVars.append(keyVar)
-            else:
-                self.dispatcher.addKeyVar(keyVar)
-            setattr(self, keyVar.name, keyVar)
+        keyVarList = [keyvar.KeyVar(actor, key) for key in keysDict.keys.values()]
+        self._keyNameVarDict.update((keyVar.name, keyVar) for keyVar in keyVarList)
+        self.__dict__.update(self._keyNameVarDict)
         
+        # keyVars that are refreshed from the hub's keyword cache need a refresh command;
+        # set it before adding the keyVars to the dispatcher
+        cachedKeyVars = [keyVar for keyVar in keyVarList if keyVar.key.doCache and not keyVar.hasRefreshCmd]
+        cachedKeyNames = [keyVar.name for keyVar in cachedKeyVars]
+        refreshCmdPrefix = "getFor=%s " % (self.actor,)
         for ind in range(0, len(cachedKeyVars), NumKeysToGetAtOnce):
-            keyVars = cachedKeyVars[ind:ind+NumKeysToGetAtOnce]
-            keyNames = [(keyVar.name) for keyVar in keyVars]
-            refreshCmdStr = "getFor=%s %s" % (self.actor, " ".join(keyNames))
-            for keyVar in keyVars:
-                keyVar.refreshActor = "keys"
-                keyVar.refreshCmd = refreshCmdStr
-                self.dispatcher.addKeyVar(keyVar)
+            refreshCmdStr = refreshCmdPrefix + " ".join(cachedKeyNames[ind:ind+NumKeysToGetAtOnce])
+            for keyVar in cachedKeyVars[ind:ind+NumKeysToGetAtOnce]:
+                keyVar.setRefreshInfo("keys", refreshCmdStr)
+        self.dispatcher.addKeyVars(keyVarList)
 
         self._registeredActors.add(actor)
     
+    def __setattr__(self, name, value):
+        """Set an attribute, keeping track of keyVars (including synthetic keyVars added by subclasses)
+        """
+        object.__setattr__(self, name, value)
+        keyNameVarDict = self.__dict__.get("_keyNameVarDict")
+        if keyNameVarDict is None:
+            # not yet initialized; __init__ will pick up this keyVar, if it is one
+            return
+        if isinstance(value, keyvar.KeyVar):
+            keyNameVarDict[name] = value
+        else:
+            keyNameVarDict.pop(name, None)
+
+    def __delattr__(self, name):
+        """Delete an attribute, keeping track of keyVars
+        """
+        object.__delattr__(self, name)
+        keyNameVarDict = self.__dict__.get("_keyNameVarDict")
+        if keyNameVarDict is not None:
+            keyNameVarDict.pop(name, None)
+
     @property
     def keyVarDict(self):
         """Return a dictionary of keyVar name:keyVar
         """
-        retDict = dict()
-        for name, item in self.__dict__.items():
-            if isinstance(item, keyvar.KeyVar):
-                retDict[name] = item
-        return retDict
+        return dict(self._keyNameVarDict)
 
     @classmethod
     def setDispatcher(cls, dispatcher):
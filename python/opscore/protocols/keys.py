@@ -15,6 +15,7 @@ import imp
 import re
 import sys
 import hashlib
+import threading
 
 import opscore.protocols.types as protoTypes
 import opscore.protocols.messages as protoMess
@@ -24,33 +25,97 @@ import RO.Alg
 class KeysError(Exception):
     pass
 
-class Consumer(object):
+def _setDebug(target,debug):
+    """
+    Enables or disables tracing for a Consumer class or instance
+
+    trace, passed and failed are called for every consume step, so
+    rather than testing the debug flag each time, swap in methods that
+    do or do not trace.
+    """
+    target._debug = bool(debug)
+    if target._debug:
+        target.trace = target._traceDebug
+        target.passed = target._passedDebug
+        target.failed = target._failedDebug
+    else:
+        target.trace = target._traceQuiet
+        target.passed = target._passedQuiet
+        target.failed = target._failedQuiet
+
+class _ConsumerType(type):
+    """
+    Metaclass for Consumer, so that setting debug on a class swaps its tracing methods
+    """
+    @property
+    def debug(cls):
+        return cls._debug
+
+    @debug.setter
+    def debug(cls,debug):
+        _setDebug(cls,debug)
+
+class Consumer(object,metaclass=_ConsumerType):
     """
     Consumes parsed messages
     """
 
-    # set debug True to generate detailed tracing of all the consume activity
-    debug = False
+    # set debug True (on this class, a subclass or an instance)
+    # to generate detailed tracing of all the consume activity
+    _debug = False
+
+    # per-thread trace indentation, so concurrent consumers do not garble each other's output
+    _traceState = threading.local()
+
+    @property
+    def debug(self):
+        return self._debug
+
+    @debug.setter
+    def debug(self,debug):
+        _setDebug(self,debug)
 
-    indent = 0
+    @staticmethod
+    def setDebug(debug):
+        """
+        Enables or disables detailed tracing of all the consume activity
+        """
+        Consumer.debug = debug
 
-    def trace(self,what):
-        if self.debug:
-            print('%s%r << %r' % (' '*Consumer.indent,self,what))
-            Consumer.indent += 1
+    def _traceQuiet(self,what):
+        pass
+
+    def _passedQuiet(self,what):
+        return True
+
+    def _failedQuiet(self,reason):
+        return False
+
+    @staticmethod
+    def _changeIndent(delta):
+        """
+        Changes the trace indentation for this thread by delta and returns the result
+        """
+        indent = getattr(Consumer._traceState,'indent',0) + delta
+        Consumer._traceState.indent = indent
+        return indent
+
+    def _traceDebug(self,what):
+        print('%s%r << %r' % (' '*Consumer._changeIndent(0),self,what))
+        Consumer._changeIndent(1)
             
-    def passed(self,what):
-        if self.debug:
-            Consumer.indent -= 1
-            print('%sPASS >> %r' % (' '*Consumer.indent,what))
+    def _passedDebug(self,what):
+        print('%sPASS >> %r' % (' '*Consumer._changeIndent(-1),what))
         return True
 
-    def failed(self,reason):
-        if self.debug:
-            Consumer.indent -= 1
-            print('%sFAIL: %s' % (' '*Consumer.indent,reason))
+    def _failedDebug(self,reason):
+        print('%sFAIL: %s' % (' '*Consumer._changeIndent(-1),reason))
         return False
 
+    trace = _traceQuiet
+    passed = _passedQuiet
+    failed = _failedQuiet
+
     def consume(self,what):
         raise NotImplementedError
 
@@ -92,62 +157,146 @@ class TypedValues(Consumer):
             self.descriptor = '%d or more' % self.minVals
         else:
             self.descriptor = '%d-%d' % (self.minVals,self.maxVals)
+        # a single repeated value type (e.g. Float()*3) is common enough to get its own path
+        if len(self.vtypes) == 1 and isinstance(self.vtypes[0],protoTypes.RepeatedValueType):
+            self._repeatedType = self.vtypes[0]
+        else:
+            self._repeatedType = None
+        # the type of each value, if the number of values is fixed and there are
+        # no compound or by-name value types; used by needsCoercion and consume
+        if self.minVals == self.maxVals and all(
+            isinstance(vtype,(protoTypes.ValueType,protoTypes.RepeatedValueType)) for vtype in self.vtypes):
+            valueClasses = [ ]
+            for vtype in self.vtypes:
+                if isinstance(vtype,protoTypes.RepeatedValueType):
+                    valueClasses.extend([vtype.vtype]*vtype.minRepeat)
+                else:
+                    valueClasses.append(vtype)
+            self._valueClasses = tuple(valueClasses)
+        else:
+            self._valueClasses = None
 
     def __repr__(self):
         return 'Types%r' % self.vtypes
 
     def consume(self,values):
         self.trace(values)
-        # remember the original values in case we need to restore them later
-        self.originalValues = protoMess.Values(values)
-        values[:] = [ ]
+        if self._valueClasses is not None:
+            return self._consumeFixed(values)
+        if self._repeatedType is not None:
+            return self._consumeRepeated(values)
+        # convert into a new list, so the original values need no copy or restore on failure
+        self.originalValues = values
+        converted = [ ]
+        consumeNextValue = self.consumeNextValue
         # try to convert each keyword to its expected type
         self.index = 0
         for typeToConsume in self.vtypes:
             if isinstance(typeToConsume,protoTypes.RepeatedValueType):
                 vtype = typeToConsume.vtype
+                minRepeat = typeToConsume.minRepeat
+                maxRepeat = typeToConsume.maxRepeat
                 offset = 0
-                while offset < typeToConsume.minRepeat:
-                    if not self.consumeNextValue(vtype,values):
-                        values[:] = self.originalValues
+                while offset < minRepeat:
+                    if not consumeNextValue(vtype,converted):
                         return self.failed("expected repeated value type %r" % typeToConsume)
                     offset += 1
-                while typeToConsume.maxRepeat is None or offset < typeToConsume.maxRepeat:
-                    if not self.consumeNextValue(vtype,values):
+                while maxRepeat is None or offset < maxRepeat:
+                    if not consumeNextValue(vtype,converted):
                         break
                     offset += 1
             elif isinstance(typeToConsume,protoTypes.ValueType):
-                if not self.consumeNextValue(typeToConsume,values):
-                    values[:] = self.originalValues
+                if not consumeNextValue(typeToConsume,converted):
                     return self.failed("expected value type %r" % typeToConsume)
             elif isinstance(typeToConsume,protoTypes.CompoundValueType):
                 for vtype in typeToConsume.vtypes:
-                    if not self.consumeNextValue(vtype,values):
-                        values[:] = self.originalValues
+                    if not consumeNextValue(vtype,converted):
                         return self.failed("expected compound value type %r" % typeToConsume)
                 # Optionally replace the values with a reference to a single object
                 # initialized with the values. The default object is a tuple.
                 if protoTypes.CompoundValueType.WrapEnable:
                     size = len(typeToConsume.vtypes)
-                    wrapped = tuple(values[-size:])
+                    wrapped = tuple(converted[-size:])
                     if typeToConsume.wrapper:
                         wrapped = typeToConsume.wrapper(*wrapped)
-                    values[-size:] = [wrapped]
+                    converted[-size:] = [wrapped]
             else:
                 raise KeysError('Unexpected typeToConsume: %r' % typeToConsume)
-        if self.index != len(self.originalValues):
-            values[:] = self.originalValues
+        if self.index != len(values):
             return self.failed("not all values consumed: %s" % values[self.index:])
+        values[:] = converted
+        return self.passed(values)
+
+    def needsCoercion(self,values):
+        """
+        Returns False if values need no conversion, else True
+
+        Values need no conversion if there is exactly one value for each declared value type
+        and each value is of exactly that type (e.g. the values were previously consumed).
+        Always returns True for a variable number of values or compound or by-name value types.
+        """
+        valueClasses = self._valueClasses
+        if valueClasses is None or len(values) != len(valueClasses):
+            return True
+        for value,valueClass in zip(values,valueClasses):
+            if type(value) is not valueClass:
+                return True
+        return False
+
+    def _consumeFixed(self,values):
+        """
+        Consumes values for a fixed number of simple or repeated value types
+
+        Equivalent to the general consume but converts the values in one pass,
+        without saving and restoring a copy of the original values.
+        """
+        valueClasses = self._valueClasses
+        if len(values) != len(valueClasses):
+            return self.failed("expected %d values" % len(valueClasses))
+        converted = [ ]
+        for valueClass,string in zip(valueClasses,values):
+            try:
+                converted.append(valueClass(string))
+            except protoTypes.InvalidValueError:
+                converted.append(protoTypes.InvalidValue)
+            except (ValueError,TypeError,OverflowError):
+                return self.failed("expected value type %r" % valueClass)
+        values[:] = converted
+        return self.passed(values)
+
+    def _consumeRepeated(self,values):
+        """
+        Consumes values that all have the same type, for a single repeated value type
+
+        Equivalent to the general consume but converts the values in one pass,
+        without saving and restoring a copy of the original values.
+        """
+        typeToConsume = self._repeatedType
+        nValues = len(values)
+        if nValues < typeToConsume.minRepeat or (
+            typeToConsume.maxRepeat is not None and nValues > typeToConsume.maxRepeat):
+            return self.failed("expected repeated value type %r" % typeToConsume)
+        vtype = typeToConsume.vtype
+        converted = [ ]
+        for string in values:
+            try:
+                converted.append(vtype(string))
+            except protoTypes.InvalidValueError:
+                converted.append(protoTypes.InvalidValue)
+            except (ValueError,TypeError,OverflowError):
+                return self.failed("expected repeated value type %r" % typeToConsume)
+        values[:] = converted
         return self.passed(values)
 
     def consumeNextValue(self,valueType,values):
+        index = self.index
         try:
-            string = self.originalValues[self.index]
+            string = self.originalValues[index]
             try:
                 values.append(valueType(string))
             except protoTypes.InvalidValueError:
                 values.append(protoTypes.InvalidValue)
-            self.index += 1
+            self.index = index + 1
             return True
         except (IndexError,ValueError,TypeError,OverflowError):
             return False
@@ -219,6 +368,10 @@ class Key(Consumer):
         if len(values) == 1 and isinstance(values[0],list):
             values = values[0]
         keyword = protoMess.Keyword(self.name,values)
+        if not self.typedValues.needsCoercion(keyword.values):
+            # the values already have exactly the expected types
+            keyword.matched = True
+            return keyword
         if not self.consume(keyword):
             raise KeysError('value types do not match for keyword %s: %r'
                 % (self.name,values))
@@ -312,6 +465,10 @@ class RawKey(Consumer):
 class KeysDictionaryError(KeysError):
     pass
 
+# serializes loading keys dictionaries from disk, so concurrent loads of one dictionary
+# read and evaluate the file only once
+_loadLock = threading.Lock()
+
 class KeysDictionary(object):
     """
     A collection of Keys associated with a given name
@@ -418,6 +575,19 @@ class KeysDictionary(object):
         """
         if not forceReload and dictname in KeysDictionary.registry:
             return KeysDictionary.registry[dictname]
+        with _loadLock:
+            # another thread may have loaded the dictionary while we waited for the lock
+            if not forceReload and dictname in KeysDictionary.registry:
+                return KeysDictionary.registry[dictname]
+            return KeysDictionary._loadFile(dictname)
+
+    @staticmethod
+    def _loadFile(dictname):
+        """
+        Loads a KeysDictionary by name from disk, returning the result
+        
+        Call with _loadLock held.
+        """
         # try to find a corresponding file on the import search path
         dictfile = None
         try:
@@ -10,6 +10,7 @@ from builtins import bytes, str
 from past.builtins import basestring
 from builtins import object
 import re
+import sys
 import opscore.protocols.types as types
 
 class MessageError(Exception):
@@ -23,6 +24,8 @@ class Canonized(object):
     equality via the __eq__ and __ne__ operators. The tokenized string
     representation defines grammatical equality.
     """
+    __slots__ = ()
+
     def canonical(self):
         raise NotImplementedError
     def tokenized(self):
@@ -38,6 +41,7 @@ class Values(list,Canonized):
     """
     Represents the values associated with a command or keyword
     """
+    __slots__ = ()
 
     # keyword or cmd values that do not match this pattern are quoted in canonical form
     unquoted = re.compile(r'[^"\'\s=,][^\s=,]*$')
@@ -52,23 +56,30 @@ class Values(list,Canonized):
         white space. A single value is always quoted. A canonical string
         is, by definition, invariant under parsing.
         """
-        result = ''
-        for (comma,value) in enumerate(self):
-            if comma:
-                result += ','
+        parts = []
+        append = parts.append
+        unquotedMatch = self.unquoted.match
+        # a lone value must be quoted so it is not confused with a keyword name
+        mayBeUnquoted = len(self) > 1
+        for value in self:
             if isinstance(value,float):
-                # use repr to capture the full precision
+                # use repr to capture the full precision; the result never needs quoting
                 value = repr(float(value))
+                if mayBeUnquoted:
+                    append(value)
+                    continue
             elif not isinstance(value,basestring):
                 value = str(value)
-            if self.unquoted.match(value) and (comma or len(self) > 1):
-                # a lone value must be quoted so it is not confused with a keyword name
-                result += value
+            # isalnum is a much cheaper test than the regex and covers most names and integers
+            if mayBeUnquoted and (value.isalnum() or unquotedMatch(value)):
+                append(value)
             else:
+                if '\\' in value:
+                    # decoding escapes is only needed (and only changes anything) if there is a backslash
+                    value = bytes(value, 'latin-1').decode('unicode_escape')
                 # only double quotes need to be escaped
-                bstring = bytes(value, 'latin-1')
-                result += '"%s"' % bstring.decode('unicode_escape').replace('"','\\"')
-        return result
+                append('"%s"' % value.replace('"','\\"'))
+        return ','.join(parts)
         
     def tokenized(self):
         """
@@ -78,17 +89,15 @@ class Values(list,Canonized):
         keyword. Does not distinguish between quoted and unquoted
         values. A tokenized string is invariant under parsing.
         """
-        result = ''
-        for (comma,value) in enumerate(self):
-            if comma:
-                result += ','
-            result += '123'
-        return result
+        return ','.join(['123']*len(self))
 
 class Keyword(Canonized):
     """
     Represents a keyword and its values
     """
+    # messages are created for every reply, so avoid a per-instance __dict__
+    __slots__ = ('name','lowerName','values','matched')
+
     def __init__(self,name,values=None):
         """
         Creates a new keyword instance
@@ -97,9 +106,12 @@ class Keyword(Canonized):
         not be used. No checks are performed on the characters used in
         the name (the parser has normally already done this).
         """
-        if name.lower() == 'raw':
+        lowerName = name.lower()
+        if lowerName == 'raw':
             raise MessageError('keyword "%s" is reserved' % name)
-        self.name = name
+        # the same few keyword names occur in many messages, so share one copy of each
+        self.name = sys.intern(str(name))
+        self.lowerName = sys.intern(str(lowerName))
         self.values = Values(values or [])
         self.matched = False
         
@@ -111,8 +123,8 @@ class Keyword(Canonized):
         The canonical form of a keyword name is all lower case. A
         canonical string is, by definition, invariant under parsing.
         """
-        result = self.name.lower()
-        if self.values and len(self.values) > 0:
+        result = self.lowerName
+        if self.values:
             result += '=%s' % self.values.canonical()
         return result               
 
@@ -124,7 +136,7 @@ class Keyword(Canonized):
         basic grammar. A tokenized string is invariant under parsing.
         """
         result = 'KEY'
-        if self.values and len(self.values) > 0:
+        if self.values:
             result += '=%s' % self.values.tokenized()
         return result
         
@@ -141,6 +153,7 @@ class Keyword(Canonized):
         Copies the attributes of another Keyword instance
         """
         self.name = other.name
+        self.lowerName = other.lowerName
         self.values = other.values
         self.matched = other.matched
 
@@ -154,11 +167,14 @@ class RawKeyword(Keyword):
     """
     Represents the reserved RAW keyword
     """
+    __slots__ = ()
+
     def __init__(self,line):
         """
         Creates a new raw keyword instance
         """
         self.name = 'raw'
+        self.lowerName = 'raw'
         self.values = Values([line])
         self.matched = False
 
@@ -198,6 +214,25 @@ class Keywords(list,Canonized):
     """
     Represents an ordered set of keywords
     """
+
+    # _nameDict is a dict of lower case keyword name: first keyword with that name;
+    # it is built by the first lookup by name and discarded whenever the list is modified
+    __slots__ = ('_nameDict',)
+
+    def _getNameDict(self):
+        """
+        Returns the dict of lower case keyword name: first keyword with that name
+        """
+        try:
+            nameDict = self._nameDict
+        except AttributeError:
+            nameDict = None
+        if nameDict is None:
+            nameDict = { }
+            for k in self:
+                nameDict.setdefault(k.lowerName,k)
+            self._nameDict = nameDict
+        return nameDict
     
     def canonical(self,delimiter):
         """
@@ -207,12 +242,7 @@ class Keywords(list,Canonized):
         equivalent. Keyword ordering is considered to be significant. A
         canonical string is, by definition, invariant under parsing.
         """
-        result = ''
-        for delimited,keyword in enumerate(self):
-            if delimited:
-                result += delimiter
-            result += keyword.canonical()
-        return result
+        return delimiter.join([keyword.canonical() for keyword in self])
 
     def tokenized(self,delimiter):
         """
@@ -222,12 +252,7 @@ class Keywords(list,Canonized):
         same basic grammar. Keyword ordering is considered to be
         significant. A tokenized string is invariant under parsing.
         """
-        result = ''
-        for delimited,keyword in enumerate(self):
-            if delimited:
-                result += delimiter
-            result += keyword.tokenized()
-        return result
+        return delimiter.join([keyword.tokenized() for keyword in self])
         
     def clone(self):
         """
@@ -256,11 +281,10 @@ class Keywords(list,Canonized):
             return list.__getitem__(self,index)
         except TypeError:
             if isinstance(index,basestring):
-                name = index.lower()
-                for k in self:
-                    if k.name.lower() == name:
-                        return k
-                raise KeyError(index)
+                try:
+                    return self._getNameDict()[index.lower()]
+                except KeyError:
+                    raise KeyError(index)
             raise TypeError('Keywords index must be integer or string')
             
     def __getslice__(self,begin,end):
@@ -274,13 +298,94 @@ class Keywords(list,Canonized):
         Tests if a keyword with the specified name is present
         """
         if isinstance(name,basestring):
-            lower = name.lower()
-            for k in self:
-                if k.name.lower() == lower:
-                    return True
-            return False
+            return name.lower() in self._getNameDict()
         raise TypeError('Keyword names must be strings')
 
+    # the remaining methods modify the list, so they discard the name dict first
+
+    def __setitem__(self,index,value):
+        """
+        Replaces the keyword or keywords at the specified index or slice
+        """
+        self._nameDict = None
+        list.__setitem__(self,index,value)
+
+    def __delitem__(self,index):
+        """
+        Deletes the keyword or keywords at the specified index or slice
+        """
+        self._nameDict = None
+        list.__delitem__(self,index)
+
+    def __iadd__(self,other):
+        """
+        Appends the keywords of another sequence in place
+        """
+        self._nameDict = None
+        return list.__iadd__(self,other)
+
+    def __imul__(self,count):
+        """
+        Repeats the keywords in place
+        """
+        self._nameDict = None
+        return list.__imul__(self,count)
+
+    def append(self,keyword):
+        """
+        Appends a keyword
+        """
+        self._nameDict = None
+        list.append(self,keyword)
+
+    def extend(self,keywords):
+        """
+        Appends the keywords of another sequence
+        """
+        self._nameDict = None
+        list.extend(self,keywords)
+
+    def insert(self,index,keyword):
+        """
+        Inserts a keyword before the specified index
+        """
+        self._nameDict = None
+        list.insert(self,index,keyword)
+
+    def pop(self,index=-1):
+        """
+        Removes and returns the keyword at the specified index (default last)
+        """
+        self._nameDict = None
+        return list.pop(self,index)
+
+    def remove(self,keyword):
+        """
+        Removes the first occurrence of a keyword
+        """
+        self._nameDict = None
+        list.remove(self,keyword)
+
+    def clear(self):
+        """
+        Removes all keywords
+        """
+        self._nameDict = None
+        list.clear(self)
+
+    def sort(self,*args,**kwargs):
+        """
+        Sorts the keywords in place; takes the same arguments as list.sort
+        """
+        self._nameDict = None
+        list.sort(self,*args,**kwargs)
+
+    def reverse(self):
+        """
+        Reverses the keywords in place
+        """
+        self._nameDict = None
+        list.reverse(self)
 
 class ReplyHeader(Canonized):
     """
@@ -289,6 +394,9 @@ class ReplyHeader(Canonized):
     MsgCode = types.Enum('>','D','I','W','E',':','F','!',
         labelHelp=['Queued','Debug','Information','Warning','Error','Finished','Error','Fatal'],
         name='code',help='Reply header status code')
+
+    __slots__ = ('program','user','actorStack','cmdrName','commandId','actor',
+        'actorLower','isGenuine','code')
     
     def __init__(self,program,user,actorStack,commandId,actor,code):
         self.program = program
@@ -299,10 +407,31 @@ class ReplyHeader(Canonized):
         self.cmdrName = "%s.%s%s" % (self.program,self.user,self.actorStack)
         self.commandId = int(commandId)
         self.actor = actor
+        self._setActorInfo()
         try:
-            self.code = ReplyHeader.MsgCode(code)
-        except ValueError:
-            raise MessageError("Invalid reply header code: %s" % code)
+            self.code = ReplyHeader._msgCodeDict[str(code).lower()]
+        except KeyError:
+            try:
+                self.code = ReplyHeader.MsgCode(code)
+            except ValueError:
+                raise MessageError("Invalid reply header code: %s" % code)
+
+    def _setActorInfo(self):
+        """
+        Sets actorLower and isGenuine from actor
+
+        actorLower is the lower case actor name used to look up keyword
+        variables. Replies from the hub's keyword cache are issued by
+        actor keys_<actor>; for these the prefix is stripped and
+        isGenuine is False.
+        """
+        actorLower = self.actor.lower()
+        if actorLower.startswith('keys_'):
+            self.actorLower = actorLower[5:]
+            self.isGenuine = False
+        else:
+            self.actorLower = actorLower
+            self.isGenuine = True
 
     def canonical(self):
         return "%s %d %s %s" % (self.cmdrName,self.commandId,self.actor,self.code)
@@ -318,11 +447,18 @@ class ReplyHeader(Canonized):
         self.user = other.user
         self.commandId = other.commandId
         self.actor = other.actor
+        self.actorLower = other.actorLower
+        self.isGenuine = other.isGenuine
         self.code = other.code
         
     def __repr__(self):
         return 'HDR(%s,%s,%d,%s,%s)' % (self.program,self.user,self.commandId,self.actor,self.code)
 
+# dict of lower case label: MsgCode; codes are immutable, so headers share these
+# instead of each searching the labels to construct a new one
+ReplyHeader._msgCodeDict = dict((label.lower(),ReplyHeader.MsgCode(label))
+    for label in ReplyHeader.MsgCode.enumLabels)
+
 class Reply(Canonized):
     """
     Represents a reply
@@ -331,6 +467,8 @@ class Reply(Canonized):
     Keywords are ordered and duplicates do not generate a runtime
     exception.
     """
+    __slots__ = ('header','keywords','string')
+
     def __init__(self,header,keywords,string=None):
         """
         Creates a new reply instance
@@ -381,6 +519,8 @@ class CommandHeader(Canonized):
     """
     Represents the headers of a command
     """
+    __slots__ = ('cmdrName','mid','actor')
+
     def __init__(self,cmdrName,mid,actor):
         self.cmdrName = cmdrName
         self.mid = mid
@@ -416,6 +556,8 @@ class Command(Canonized):
     zero or more keywords. Keywords are ordered and duplicates do not
     generate a runtime exception.
     """
+    __slots__ = ('name','values','keywords','string')
+
     def __init__(self,name,values=None,keywords=None,string=None):
         """
         Creates a new command instance
@@ -442,13 +584,12 @@ class Command(Canonized):
         The canonical form of a verb name is all lower case. A canonical
         string is, by definition, invariant under parsing.
         """
-        result = self.name.lower()
-        if self.values and len(self.values) > 0:
-            result += ' %s' % self.values.canonical()
+        parts = [self.name.lower()]
+        if self.values:
+            parts.append(self.values.canonical())
         if self.keywords:
-            result += ' '
-            result += self.keywords.canonical(delimiter=' ')
-        return result
+            parts.append(self.keywords.canonical(delimiter=' '))
+        return ' '.join(parts)
     
     def tokenized(self):
         """
@@ -457,13 +598,12 @@ class Command(Canonized):
         Two commands with identical tokenized strings have the same
         basic grammar. A tokenized string is invariant under parsing.
         """
-        result = 'VERB'
-        if self.values and len(self.values) > 0:
-            result += ' %s' % self.values.tokenized()
+        parts = ['VERB']
+        if self.values:
+            parts.append(self.values.tokenized())
         if self.keywords:
-            result += ' '
-            result += self.keywords.tokenized(delimiter=' ')
-        return result
+            parts.append(self.keywords.tokenized(delimiter=' '))
+        return ' '.join(parts)
 
     def clone(self):
         """
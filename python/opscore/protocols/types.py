@@ -12,7 +12,9 @@ from builtins import range
 from past.builtins import basestring
 from builtins import object
 import re
+import sys
 import textwrap
+import warnings
 
 import opscore.utility.html as html
 
@@ -32,6 +34,8 @@ class Descriptive(object):
     Types that use this mixin are responsible for filling an array cls.descriptors
     of tuples (label,value) in their constructor.
     """
+    __slots__ = ()
+
     def describe(self):
         """
         Returns a plain-text multi-line description
@@ -40,13 +44,13 @@ class Descriptive(object):
         can be printed. The description is indented with spaces assuming
         a fixed-width font.
         """
-        text = ''
+        pad = '\n' + ' '*14
+        lines = [ ]
         for label,value in self.descriptors:
-            pad = '\n' + ' '*14
             formatted = textwrap.fill(textwrap.dedent(value).strip()
                 ,width=66).replace('\n',pad)
-            text += '%12s: %s\n' % (label,formatted)
-        return text[:-1]
+            lines.append('%12s: %s' % (label,formatted))
+        return '\n'.join(lines)
 
     def describeAsHTML(self):
         """
@@ -75,26 +79,6 @@ class ValueType(type,Descriptive):
         """
         Allocates memory for a new ValueType class
         """
-        def doRepr(self):
-            if self.units:
-                units = ' ' + self.units
-            else:
-                units = ''
-            if self.reprFmt:
-                return '%s(%s%s)' % (cls.__name__,self.reprFmt % self,units)
-            else:
-                return '%s(%s%s)' % (cls.__name__,cls.baseType.__repr__(self),units)
-                
-        def doStr(self):
-            if self.strFmt:
-                return self.strFmt % self
-            elif self.reprFmt:
-                return self.reprFmt % self
-            elif cls.baseType == str:
-                return str.__str__(self)
-            else:
-                return cls.baseType(self).__str__()
-                
         # check for any invalid metadata keys
         for key in kwargs.keys():
             if key not in ValueType._metaKeys and (
@@ -142,11 +126,37 @@ class ValueType(type,Descriptive):
 
         get = lambda name,default=None: kwargs.get(name,cls.__dict__.get(name,default))
 
+        # the formats and units are fixed when the class is created,
+        # so choose how to represent values now rather than on every call
+        typeName = cls.__name__
+        baseType = cls.baseType
+        reprFmt = get('reprFmt')
+        strFmt = get('strFmt')
+        units = get('units')
+        unitsSuffix = ' ' + units if units else ''
+        if reprFmt:
+            def doRepr(self):
+                return '%s(%s%s)' % (typeName,reprFmt % self,unitsSuffix)
+        else:
+            baseRepr = baseType.__repr__
+            def doRepr(self):
+                return '%s(%s%s)' % (typeName,baseRepr(self),unitsSuffix)
+        strOrReprFmt = strFmt or reprFmt
+        if strOrReprFmt:
+            def doStr(self):
+                return strOrReprFmt % self
+        elif baseType == str:
+            doStr = str.__str__
+        else:
+            baseStr = baseType.__str__
+            def doStr(self):
+                return baseStr(baseType(self))
+
         dct = {
-            'reprFmt': get('reprFmt'),
-            'strFmt': get('strFmt'),
+            'reprFmt': reprFmt,
+            'strFmt': strFmt,
             'invalid': get('invalid'),
-            'units': get('units'),
+            'units': units,
             'help': get('help'),
             'name': get('name'),
             'FITS': get('FITS'),
@@ -167,8 +177,10 @@ class ValueType(type,Descriptive):
     def __init__(cls,*args,**kwargs):
         """
         Initializes a new ValueType class
+        
+        type.__new__ has already done everything type.__init__ would,
+        so it is not called.
         """
-        super(ValueType,cls).__init__(cls.__name__,(cls.baseType,),{})
         cls.descriptors = [ ]
         if cls.name:
             cls.descriptors.append(('Name',cls.name))
@@ -197,6 +209,19 @@ class ValueType(type,Descriptive):
     def __repr__(self):
         return self.__name__
 
+    def describe(cls):
+        """
+        Returns a plain-text multi-line description
+        
+        The descriptors of a value type do not change once the type is
+        created, so the description is built on first use and cached.
+        """
+        text = cls.__dict__.get('_describeText')
+        if text is None:
+            text = Descriptive.describe(cls)
+            cls._describeText = text
+        return text
+
     def validate(self,value):
         if self.invalid and str(value).lower() == self.invalid:
             raise InvalidValueError
@@ -204,6 +229,8 @@ class ValueType(type,Descriptive):
 
 class RepeatedValueType(Descriptive):
 
+    __slots__ = ('vtype','minRepeat','maxRepeat','descriptors')
+
     def __init__(self,vtype,minRepeat,maxRepeat):
         if not isinstance(vtype,ValueType):
             raise ValueTypeError('RepeatedValueType only works for a ValueType')
@@ -284,6 +311,7 @@ class Invalid(object):
     """
     Represents an invalid value
     """
+    __slots__ = ()
     units = ''
     def __repr__(self):
         return '(invalid)'
@@ -366,10 +394,9 @@ class Hex(UInt):
     """
     reprFmt = '0x%x'
     def new(cls,value):
-        try:
+        if isinstance(value,basestring):
             return int.__new__(cls,cls.validate(value),16)
-        except TypeError:
-            return UInt.new(cls,value)
+        return UInt.new(cls,value)
 
 # Enumerated value type
 class Enum(ValueType):
@@ -383,13 +410,20 @@ class Enum(ValueType):
         if not args:
             raise ValueTypeError('missing enum labels in ctor')
         # force each label to be interpreted as a string so, for example,
-        # False->'False', 1->'1', 0xff->'255'
-        strargs = {str(arg) for arg in args}
-        dct['enumLabels'] = strargs
-        dct['enumValues'] = dict(list(zip(args,list(range(len(strargs))))))
+        # False->'False', 1->'1', 0xff->'255'; keep the order, since a label's
+        # index is its stored value, and intern the labels since they are shared
+        # by every value of this type
+        labels = tuple(sys.intern(str(arg)) for arg in args)
+        dct['enumLabels'] = labels
+        dct['enumValues'] = dict(list(zip(labels,list(range(len(labels))))))
+        # lower case label: label, for case-insensitive construction from a label
+        labelDict = { }
+        for label in labels:
+            labelDict.setdefault(label.lower(),label)
+        dct['_labelDict'] = labelDict
         # look for optional per-label help text
         labelHelp = kwargs.get('labelHelp',None)
-        if labelHelp and not len(labelHelp) == len(strargs):
+        if labelHelp and not len(labelHelp) == len(labels):
             raise ValueTypeError('wrong number of enum label help strings provided')
         dct['labelHelp'] = labelHelp
         # provide a custom storage value helper since our storage type is int2
@@ -421,10 +455,10 @@ class Enum(ValueType):
             else:
                 raise ValueError('Invalid index for Enum: %d' % value)
         value = str(value).lower()
-        for label in cls.enumLabels:
-            if value == label.lower():
-                return str.__new__(cls,label)
-        raise ValueError('Invalid label for Enum: "%s"' % value)
+        label = cls._labelDict.get(value)
+        if label is None:
+            raise ValueError('Invalid label for Enum: "%s"' % value)
+        return str.__new__(cls,label)
 
     def addDescriptors(cls):
         for index,label in enumerate(cls.enumLabels):
@@ -444,9 +478,10 @@ class Bool(ValueType):
         if not args or not len(args) == 2:
             raise ValueTypeError('missing true/false labels in ctor')
         # force the literal values to be interpreted as strings so, for example,
-        # False->'False', 0->'0'
-        dct['falseValue'] = str(args[0])
-        dct['trueValue'] = str(args[1])
+        # False->'False', 0->'0'; intern them so callers that also intern labels
+        # match on identity
+        dct['falseValue'] = sys.intern(str(args[0]))
+        dct['trueValue'] = sys.intern(str(args[1]))
         def doStr(self):
             if self:
                 return self.trueValue
@@ -454,7 +489,8 @@ class Bool(ValueType):
                 return self.falseValue
         dct['__str__'] = doStr
         if dct['strFmt']:
-            print('Bool: ignoring strFmt metadata')
+            # stacklevel 3 reports the code that created the type, not ValueType.__new__
+            warnings.warn('Bool: ignoring strFmt metadata',stacklevel=3)
     
     def new(cls,value):
         """
@@ -463,14 +499,16 @@ class Bool(ValueType):
         Value must be one of the true/false labels or else a True/False literal
         """
         cls.validate(value)
+        # values are usually label strings, so test the labels first (identity, then equality);
         # use (value == True) instead of (value is True) so that 0,1
         # can be used for False,True
-        if value == True or value == cls.trueValue:
+        trueValue = cls.trueValue
+        if value is trueValue or value == trueValue or value == True:
             return int.__new__(cls,True)
-        elif value == False or value == cls.falseValue:
+        falseValue = cls.falseValue
+        if value is falseValue or value == falseValue or value == False:
             return int.__new__(cls,False)
-        else:
-            raise ValueError('Invalid Bool value: %r' % value)
+        raise ValueError('Invalid Bool value: %r' % value)
 
     def addDescriptors(cls):
         cls.descriptors.append(('False',cls.falseValue))
@@ -479,11 +517,17 @@ class Bool(ValueType):
 # Bitfield value type
 class Bits(UInt):
     
-    fieldSpec = re.compile('([a-zA-Z0-9_]+)?(?::([0-9]+))?$')
+    fieldSpec = re.compile('([a-zA-Z0-9_]+)?(?::([0-9]+))?')
     
     @staticmethod
     def binary(value,width):
-        return ''.join([str((value>>shift)&1) for shift in range(width-1,-1,-1)])
+        if width <= 0:
+            return ''
+        return format(value & ((1<<width)-1),'0%db' % width)
+
+    @staticmethod
+    def _fieldProperty(offset,mask):
+        return property(lambda self: (self >> offset) & mask,doc='bitfield at offset %d' % offset)
 
     @classmethod
     def init(cls,dct,*args,**kwargs):
@@ -491,16 +535,20 @@ class Bits(UInt):
             raise ValueTypeError('missing bitfield specs in ctor')
         offset = 0
         fields = { }
+        # name: (offset,mask,inverted shifted mask), precomputed for set
+        setMasks = { }
         specs = [ ]
         for field in args:
-            parsed = cls.fieldSpec.match(field)
-            if not parsed or not parsed.end() == len(field):
+            parsed = cls.fieldSpec.fullmatch(field)
+            if not parsed:
                 raise ValueTypeError('invalid bitfield spec: %s' % field)
             (name,width) = parsed.groups()
             width = int(width or 1)
             if name:
                 specs.append((name,width))
-                fields[name] = (offset,int((1<<width)-1))
+                mask = int((1<<width)-1)
+                fields[name] = (offset,mask)
+                setMasks[name] = (offset,mask,~(mask << offset))
             offset += width
             if offset > 32:
                 raise ValueTypeError('total bitfield length > 32')
@@ -508,16 +556,14 @@ class Bits(UInt):
         dct['fieldSpecs'] = specs
         dct['bitFields'] = fields
         def getAttr(self,name):
-            if name not in self.bitFields:
-                raise AttributeError('no such bitfield "%s"' % name)
-            (offset,mask) = self.bitFields[name]
+            (offset,mask) = fields[name]
             return (self >> offset) & mask
-        dct['__getattr__'] = getAttr
         def setAttr(self,name,value):
-            if name not in self.bitFields:
+            try:
+                (offset,mask,invShiftedMask) = setMasks[name]
+            except KeyError:
                 raise AttributeError('no such bitfield "%s"' % name)
-            (offset,mask) = self.bitFields[name]
-            return self.__class__((self & ~(mask << offset)) | ((value & mask) << offset))
+            return self.__class__((self & invShiftedMask) | ((value & mask) << offset))
         dct['set'] = setAttr
         def doRepr(self):
             return '(%s)' % ','.join(
@@ -529,8 +575,29 @@ class Bits(UInt):
         dct['bitsString'] = bitsString
         #dct['__str__'] = doStr
         if dct['strFmt']:
-            print('Bits: ignoring strFmt metadata')
+            warnings.warn('Bits: ignoring strFmt metadata',stacklevel=3)
         
+    def __init__(cls,*args,**kwargs):
+        UInt.__init__(cls,*args,**kwargs)
+        # Read each field through its own property. A field named like an attribute
+        # of the built class (including metaclass methods such as validate, and int
+        # attributes such as real) gets no property, so that attribute is not hidden;
+        # instances still read such a field through __getattr__ if nothing else has the name.
+        shadowed = False
+        for (name,(offset,mask)) in cls.bitFields.items():
+            if hasattr(cls,name):
+                shadowed = True
+            else:
+                setattr(cls,name,Bits._fieldProperty(offset,mask))
+        if shadowed:
+            bitFields = cls.bitFields
+            def getAttr(self,name):
+                if name not in bitFields:
+                    raise AttributeError('no such bitfield "%s"' % name)
+                (offset,mask) = bitFields[name]
+                return (self >> offset) & mask
+            cls.__getattr__ = getAttr
+
     def addDescriptors(cls):
         for index,(name,width) in enumerate(cls.fieldSpecs):
             offset,mask = cls.bitFields[name]
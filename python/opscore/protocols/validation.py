@@ -14,8 +14,8 @@ import textwrap
 import opscore.protocols.messages as protoMess
 import opscore.protocols.keys as protoKeys
 
-from opscore.protocols.keys import Consumer,TypedValues,Key,CmdKey,KeysManager
-from opscore.protocols.keysformat import KeysFormatParser
+from opscore.protocols.keys import Consumer,TypedValues,Key,CmdKey,RawKey,KeysManager
+from opscore.protocols.keysformat import KeysFormatParser,Group,OneOf,Optional
 
 class ValidationError(Exception):
     pass
@@ -29,10 +29,9 @@ class KeywordsIterator(object):
         self.index = begin
     
     def keyword(self):
-        try:
+        if self.index < len(self.keys):
             return self.keys[self.index]
-        except IndexError:
-            return None
+        return None
 
     def advance(self,amount=1):
             self.index += amount
@@ -53,19 +52,50 @@ class DispatchMixin(object):
     def __rshift__(self,callback):
         if not callable(callback):
             raise ValidationError('invalid callback %r' % callback)
-        if not hasattr(self,'callbacks'):
+        if not self.callbacks:
             self.callbacks = [ ]
         self.callbacks.append(callback)
         return self
     
     def invokeCallbacks(self,message):
-        if hasattr(self,'callbacks'):
-            for callback in self.callbacks:
-                callback(message)
+        for callback in self.callbacks:
+            callback(message)
+
+def formatKeywordNames(consumer):
+    """
+    Returns the lower-case names of all keywords a format consumer can accept
+
+    Returns None if the consumer contains anything other than the consumers
+    built by KeysFormatParser, in which case any keyword might be accepted.
+    """
+    if isinstance(consumer,CmdKey):
+        return frozenset([consumer.key.name.lower()])
+    if isinstance(consumer,RawKey):
+        return frozenset(['raw'])
+    if isinstance(consumer,Group):
+        parts = consumer.positioned + consumer.floating
+    elif isinstance(consumer,OneOf):
+        parts = consumer.keys
+    elif isinstance(consumer,Optional):
+        parts = [consumer.group]
+    else:
+        return None
+    names = frozenset()
+    for part in parts:
+        partNames = formatKeywordNames(part)
+        if partNames is None:
+            return None
+        names |= partNames
+    return names
 
 class Cmd(Consumer,DispatchMixin):
     
     parser = None
+    # parsed format strings, indexed by the format; <name> references are resolved
+    # against the registered keys dictionaries at parse time, so the cache is only
+    # valid for _consumerCacheKeys, the CmdKey.keys dictionaries when it was filled
+    _consumerCache = { }
+    _consumerCacheKeys = [ ]
 
     def __init__(self,verb,*args,**metadata):
         # Initialize a shared format parser. This must be done within our ctor
@@ -75,18 +105,48 @@ class Cmd(Consumer,DispatchMixin):
         self.verb = verb
         self.typedValues = TypedValues(args[:-1])
         self.consumer = None
+        self.keywordNames = frozenset()
         if args:
             self.format = args[-1]
         else:
             self.format = ''
         if self.format:
-            self.consumer = self.parser.parse(self.format)
+            self.consumer = self._getConsumer(self.format)
+            self.keywordNames = formatKeywordNames(self.consumer)
         self.help = metadata.get('help',None)
+        self.callbacks = ( )
         
     def __repr__(self):
         return 'Cmd(%r,%r,%r)' % (self.verb,self.typedValues,self.format)
+
+    @classmethod
+    def _getConsumer(cls,format):
+        """
+        Returns the parsed consumer for a keywords format string
+
+        Cmds with the same format share one consumer, which holds no state
+        between validations. The cache is emptied whenever the registered
+        keys dictionaries change.
+        """
+        keysDicts = list(CmdKey.keys.values())
+        cacheKeys = Cmd._consumerCacheKeys
+        if len(keysDicts) != len(cacheKeys) or any(
+            kdict is not cacheKdict for kdict,cacheKdict in zip(keysDicts,cacheKeys)):
+            Cmd._consumerCache = { }
+            Cmd._consumerCacheKeys = keysDicts
+        consumer = Cmd._consumerCache.get(format)
+        if consumer is None:
+            consumer = cls.parser.parse(format)
+            Cmd._consumerCache[format] = consumer
+        return consumer
         
-    def consume(self,message):
+    def _validate(self,message):
+        """
+        Returns True if message is a command that matches this Cmd
+
+        Does not invoke any callbacks and, on success, leaves the caller to
+        report the pass. On failure, the command's keywords are restored.
+        """
         self.trace(message)
         if not isinstance(message,protoMess.Command):
             return self.failed('message is not a command')
@@ -95,47 +155,39 @@ class Cmd(Consumer,DispatchMixin):
         # match any command values
         if not self.typedValues.consume(message.values):
             return self.failed('no match for command values')
-        # remember the current state of our parsed command in case we need to
-        # restore it after an incomplete keywords validation
-        self.checkpoint = message.clone()
         # try to match all of this command's keywords against our format string
         iterator = KeywordsIterator(message.keywords)
-        if self.consumer and not self.consumer.consume(iterator):
-            # restore the original message
-            message.copy(self.checkpoint)
-            return self.failed('keywords do not match format string')
+        checkpoint = None
+        if self.consumer:
+            # remember the current state of our parsed keywords in case we need to
+            # restore them after an incomplete keywords validation (only the
+            # consumer can modify them, and only if there are any)
+            if message.keywords:
+                checkpoint = message.keywords.clone()
+            if not self.consumer.consume(iterator):
+                # restore the original keywords
+                if checkpoint is not None:
+                    message.keywords = checkpoint
+                return self.failed('keywords do not match format string')
         if iterator.keyword():
-            # restore the original message
-            message.copy(self.checkpoint)
+            # restore the original keywords
+            if checkpoint is not None:
+                message.keywords = checkpoint
             return self.failed('command has unmatched keywords: %r' % iterator)
+        return True
+
+    def consume(self,message):
+        if not self._validate(message):
+            return False
         # if we get here, the message has been fully validated
         self.invokeCallbacks(message)
         return self.passed(message)
         
     def match(self,message):
-        self.trace(message)
-        if not isinstance(message,protoMess.Command):
-            return self.failed('message is not a command')
-        if not message.name == self.verb:
-            return self.failed('command has wrong verb')
-        # match any command values
-        if not self.typedValues.consume(message.values):
-            return self.failed('no match for command values')
-        # remember the current state of our parsed command in case we need to
-        # restore it after an incomplete keywords validation
-        self.checkpoint = message.clone()
-        # try to match all of this command's keywords against our format string
-        iterator = KeywordsIterator(message.keywords)
-        if self.consumer and not self.consumer.consume(iterator):
-            # restore the original message
-            message.copy(self.checkpoint)
-            return self.failed('keywords do not match format string')
-        if iterator.keyword():
-            # restore the original message
-            message.copy(self.checkpoint)
-            return self.failed('command has unmatched keywords: %r' % iterator)
+        if not self._validate(message):
+            return False
         # if we get here, the message has been fully validated
-
+        self.passed(message)
         return message, self.callbacks
         
     def create(self,*kspecs,**kwargs):
@@ -182,8 +234,8 @@ class HandlerBase(object):
     """
     def consume(self,string):
         for line in string.split('\n'):
-            # ignore empty lines
-            if not line.strip():
+            # ignore empty lines (isspace avoids building a stripped copy)
+            if not line or line.isspace():
                 continue
             # try to parse this line
             try:
@@ -234,18 +286,30 @@ class CommandHandler(HandlerBase):
             if self.consumers[name] == []:
                 del self.consumers[name]
         
-    def consumeLine(self,parsed):
+    def candidates(self,parsed):
+        """
+        Returns the consumer Cmds that might accept a parsed command, in order
+
+        A Cmd whose format string cannot accept one of the command's keywords
+        is skipped without attempting a full validation.
+        """
         if not parsed.name in self.consumers:
             raise ValidationError("No handler for cmd: %s" % parsed.name)
-        for consumer in self.consumers[parsed.name]:
+        consumers = self.consumers[parsed.name]
+        if len(consumers) == 1 or not parsed.keywords:
+            return consumers
+        names = frozenset([keyword.lowerName for keyword in parsed.keywords])
+        return [consumer for consumer in consumers
+            if consumer.keywordNames is None or names <= consumer.keywordNames]
+
+    def consumeLine(self,parsed):
+        for consumer in self.candidates(parsed):
             if consumer.consume(parsed):
                 return
         raise ValidationError("Invalid cmd: %s" % parsed.canonical())
 
     def matchLine(self,parsed):
-        if not parsed.name in self.consumers:
-            raise ValidationError("No handler for cmd: %s" % parsed.name)
-        for consumer in self.consumers[parsed.name]:
+        for consumer in self.candidates(parsed):
             retval = consumer.match(parsed)
             if retval:
                 return retval
@@ -257,6 +321,7 @@ class ReplyKey(Consumer,DispatchMixin,KeysManager):
     """
     def __init__(self,name):
         self.key = ReplyKey.getKey(name)
+        self.callbacks = ( )
 
     def __repr__(self):
         return 'ReplyKey(%s)' % self.key.name
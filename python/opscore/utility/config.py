@@ -10,15 +10,17 @@ from __future__ import division
 
 from future import standard_library
 standard_library.install_aliases()
-from builtins import chr
 from builtins import str
-from builtins import range
-from past.utils import old_div
 import sys
+import binascii
 import os,os.path
 import optparse
 import configparser
 
+# zero bytes for checking the padding of decrypted secrets, long enough
+# for any cipher block size
+_zeroPadding = b'\x00'*256
+
 class ConfigError(Exception):
     pass
 
@@ -44,6 +46,12 @@ class ProductConfig(configparser.SafeConfigParser):
         # read all available INI config parameters
         self.foundFiles = self.read(configFiles)
         
+    def hasValue(self,optionName):
+        """
+        Returns True if the named option is defined in our section
+        """
+        return self.has_option(self.sectionName,optionName)
+
     def getValue(self,optionName,getType=None):
         """
         Returns the named option value using a typed accessor.
@@ -93,6 +101,8 @@ class ConfigOptionParser(optparse.OptionParser):
         self.configOptions = ProductConfig(productName,configFileName,sectionName)
         # initialize our list of secret option names
         self.secretOptions = [ ]
+        # decryption engines for secret options, indexed by their key
+        self._secretEngines = { }
         # initialize our base class
         optparse.OptionParser.__init__(self,*args,**kwargs)
 
@@ -114,10 +124,12 @@ class ConfigOptionParser(optparse.OptionParser):
             if alias[:2] != '--':
                 continue
             # lookup each long-form option name in turn, until we get a match
+            # (checking first, since most options are usually not configured)
             optionName = alias[2:]
+            if not self.configOptions.hasValue(optionName):
+                continue
             try:
-                defaultValue = self.configOptions.getValue(optionName,getType)
-                kwargs['default'] = defaultValue
+                kwargs['default'] = self.configOptions.getValue(optionName,getType)
                 break
             except ConfigError:
                 pass
@@ -173,12 +185,17 @@ class ConfigOptionParser(optparse.OptionParser):
                 passphrase = getpass.getpass(prompt)
             key = hasher.new(passphrase).digest()
             assert(len(key) in [16,24,32])
-            engine = cipher.new(key,cipher.MODE_ECB)
+            # reuse the engine from an earlier call with the same pass phrase,
+            # rather than repeating the AES key setup (ECB decryption is stateless)
+            engine = self._secretEngines.get(key)
+            if engine is None:
+                engine = cipher.new(key,cipher.MODE_ECB)
+                self._secretEngines[key] = engine
             for secret in self.secretOptions:
                 data = engine.decrypt(ConfigOptionParser.hex2bin(getattr(options,secret)))
-                npad = ord(data[-1])
+                npad = bytearray(data[-1:])[0]
                 if (npad <= 0 or npad > cipher.block_size or
-                    data[-npad:-1] != '\x00'*(npad-1)):
+                    data[-npad:-1] != _zeroPadding[:npad-1]):
                     raise optparse.OptionValueError('badly formed value for %s' % secret)
                 setattr(options,secret,data[0:-npad])
         # return the parse results
@@ -213,8 +230,10 @@ class ConfigOptionParser(optparse.OptionParser):
         """
         Returns an ASCII hexadecimal representation of binary data
         """
-        bytes = ['%02x' % ord(c) for c in data]
-        return ''.join(bytes)
+        if isinstance(data,str):
+            # text holds one byte per character, as the original str did
+            data = data.encode('latin-1')
+        return binascii.hexlify(data).decode('ascii')
 
     @staticmethod
     def hex2bin(data):
@@ -224,9 +243,6 @@ class ConfigOptionParser(optparse.OptionParser):
         if not len(data) % 2 == 0:
             raise ConfigError('hex digest must have even length')
         try:
-            bytes = [ ]
-            for index in range(old_div(len(data),2)):
-                bytes.append(chr(int(data[2*index:2*(index+1)],16)))
-            return ''.join(bytes)
-        except ValueError:
+            return binascii.unhexlify(data)
+        except (binascii.Error,TypeError,ValueError):
             raise ConfigError('badly formmated hex digest')
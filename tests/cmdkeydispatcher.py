@@ -0,0 +1,265 @@
+import unittest
+
+import opscore.protocols.keys as protoKeys
+import opscore.protocols.types as protoTypes
+import opscore.actor.keyvar as keyvar
+import opscore.actor.cmdkeydispatcher as cmdkeydispatcher
+
+class TestReplyBatch(unittest.TestCase):
+    """Dispatching replies as a batch must look the same to callbacks as one at a time."""
+
+    def setUp(self):
+        self.dispatcher = cmdkeydispatcher.CmdKeyVarDispatcher()
+        self.posVar = keyvar.KeyVar('test', protoKeys.Key('pos', protoTypes.Float()*2))
+        self.dispatcher.addKeyVar(self.posVar)
+        self.seen = []
+        self.onPos = None
+        self.onCmd = None
+        self.posVar.addCallback(self.keyVarCallback, callNow=False)
+        self.cmdVars = []
+        for ind in range(2):
+            self.executeCmd()
+
+    def executeCmd(self):
+        cmdVar = keyvar.CmdVar(actor='test', cmdStr='cmd%d' % (len(self.cmdVars),), keyVars=[self.posVar],
+                               callFunc=self.cmdCallback, callCodes=keyvar.AllCodes)
+        self.cmdVars.append(cmdVar)
+        self.dispatcher.executeCmd(cmdVar)
+
+    def keyVarCallback(self, keyVar):
+        self.seen.append(('pos', keyVar.valueList, sorted(self.dispatcher.cmdDict)))
+        if self.onPos:
+            self.onPos()
+
+    def cmdCallback(self, cmdVar):
+        self.seen.append((cmdVar.cmdStr, str(cmdVar.lastCode), self.posVar.valueList,
+                          len(cmdVar.replyList)))
+        if self.onCmd:
+            self.onCmd(cmdVar)
+
+    def replyStrList(self):
+        cmdID0, cmdID1 = [cmdVar.cmdID for cmdVar in self.cmdVars]
+        return [
+            'me.me %d test > ' % (cmdID0,),
+            'me.me %d test i pos=1,2' % (cmdID0,),
+            'me.me %d test i text="no keyVars"' % (cmdID0,),
+            'me.me %d test > ' % (cmdID1,),
+            'me.me %d test i text="no keyVars"' % (cmdID0,),
+            'other.user 99 test i pos=5,6',
+            'me.me %d test i pos=3,4' % (cmdID1,),
+            'me.me %d test : ' % (cmdID0,),
+            'me.me %d test i text="after done"' % (cmdID0,),
+            'me.me %d test w ' % (cmdID1,),
+            'me.me %d test f ' % (cmdID1,),
+        ]
+
+    def dispatchOneByOne(self):
+        for replyStr in self.replyStrList():
+            self.dispatcher.dispatchReplyStr(replyStr)
+        return self.seen
+
+    def assertBatchMatchesOneByOne(self, replyStrList, prepare=None):
+        """Dispatch replyStrList one at a time and as a batch and check that callbacks see the same things.
+
+        prepare, if specified, is called after each setUp, before dispatching.
+        """
+        if prepare:
+            prepare()
+        for replyStr in replyStrList:
+            self.dispatcher.dispatchReplyStr(replyStr)
+        oneByOne = self.seen
+        cmdVarState = [(cmdVar.lastCode, cmdVar.getKeyVarData(self.posVar)) for cmdVar in self.cmdVars]
+        self.setUp()
+        if prepare:
+            prepare()
+        self.dispatcher.dispatchReplyStrBatch(replyStrList)
+        self.assertEqual(self.seen, oneByOne)
+        self.assertEqual([(cmdVar.lastCode, cmdVar.getKeyVarData(self.posVar)) for cmdVar in self.cmdVars],
+                         cmdVarState)
+
+    def test_matchesOneByOne(self):
+        oneByOne = self.dispatchOneByOne()
+        cmdVarData = [cmdVar.getKeyVarData(self.posVar) for cmdVar in self.cmdVars]
+        self.setUp()
+        self.dispatcher.dispatchReplyStrBatch(self.replyStrList())
+        self.assertEqual(self.seen, oneByOne)
+        self.assertEqual([cmdVar.getKeyVarData(self.posVar) for cmdVar in self.cmdVars], cmdVarData)
+        self.assertTrue(all(cmdVar.isDone for cmdVar in self.cmdVars))
+        self.assertEqual(self.dispatcher.cmdDict, {})
+
+    def test_callbackSeesOwnReply(self):
+        self.dispatcher.dispatchReplyStrBatch(self.replyStrList())
+        self.assertIn(('cmd0', 'I', (1.0, 2.0), 2), self.seen)
+
+    def test_doneMidBatch(self):
+        """A command that finishes mid-batch is gone from cmdDict before later replies"""
+        logged = []
+        def prepare():
+            def logFunc(msgStr, **kwargs):
+                logged.append((msgStr, sorted(self.dispatcher.cmdDict)))
+            self.dispatcher.setLogFunc(logFunc)
+        self.assertBatchMatchesOneByOne([
+            'me.me 1 test > ',
+            'me.me 2 test > ',
+            'me.me 1 test : ',
+            'me.me 1 test i text="after done"',
+            'me.me 2 test i pos=1,2',
+            'me.me 1 test i pos=3,4',
+            'me.me 2 test : ',
+        ], prepare=prepare)
+        self.assertEqual(logged[:len(logged) // 2], logged[len(logged) // 2:])
+        self.assertIn(('me.me 1 test i text="after done"', [2]), logged)
+        self.assertIn(('pos', (1.0, 2.0), [2]), self.seen)
+        self.assertEqual(len(self.cmdVars[0].replyList), 2)
+        self.assertEqual(self.cmdVars[0].getKeyVarData(self.posVar), [])
+
+    def test_timeoutMidBatch(self):
+        """A command that times out mid-batch gets no more replies"""
+        def prepare():
+            def timeOutCmd1():
+                self.onPos = None
+                self.cmdVars[1].maxEndTime = 1
+                self.dispatcher.checkCmdTimeouts()
+            self.onPos = timeOutCmd1
+        self.assertBatchMatchesOneByOne([
+            'me.me 1 test > ',
+            'me.me 2 test > ',
+            'me.me 2 test i text="before timeout"',
+            'me.me 1 test i pos=1,2',
+            'me.me 2 test i pos=3,4',
+            'me.me 1 test : ',
+            'me.me 2 test : ',
+        ], prepare=prepare)
+        self.assertTrue(self.cmdVars[1].didFail)
+        self.assertEqual(len(self.cmdVars[1].replyList), 3)
+        self.assertEqual(self.dispatcher.cmdDict, {})
+
+    def test_doneReplySetsKeyVars(self):
+        """A reply that sets KeyVars and finishes the command"""
+        self.assertBatchMatchesOneByOne([
+            'me.me 1 test > ',
+            'me.me 2 test > ',
+            'me.me 2 test i text="pending"',
+            'me.me 1 test : pos=7,8',
+            'me.me 2 test i pos=9,10',
+            'me.me 2 test : ',
+        ])
+        self.assertIn(('cmd0', ':', (7.0, 8.0), 2), self.seen)
+        self.assertEqual(self.cmdVars[0].getKeyVarData(self.posVar), [(7.0, 8.0)])
+
+    def test_callbackExecutesCmd(self):
+        """A command callback that issues a new command mid-batch"""
+        def prepare():
+            def executeCmd(cmdVar):
+                if cmdVar is self.cmdVars[0] and str(cmdVar.lastCode) == '>':
+                    self.executeCmd()
+            self.onCmd = executeCmd
+        self.assertBatchMatchesOneByOne([
+            'me.me 1 test > ',
+            'me.me 2 test > ',
+            'me.me 3 test > ',
+            'me.me 3 test i pos=1,2',
+            'me.me 1 test : ',
+            'me.me 3 test : ',
+            'me.me 2 test : ',
+        ], prepare=prepare)
+        self.assertEqual(len(self.cmdVars), 3)
+        self.assertEqual(self.cmdVars[2].getKeyVarData(self.posVar), [(1.0, 2.0)])
+        self.assertEqual(self.dispatcher.cmdDict, {})
+
+class TestGroupCallbacks(unittest.TestCase):
+    """KeyVars with groupCallbacks get one callback per batch."""
+
+    def setUp(self):
+        self.dispatcher = cmdkeydispatcher.CmdKeyVarDispatcher()
+        self.posVar = keyvar.KeyVar('test', protoKeys.Key('pos', protoTypes.Float()*2))
+        self.tempVar = keyvar.KeyVar('test', protoKeys.Key('temp', protoTypes.Float()), groupCallbacks=True)
+        self.dispatcher.addKeyVars([self.posVar, self.tempVar])
+        self.seen = []
+        self.onPos = None
+        self.posVar.addCallback(self.posCallback, callNow=False)
+        self.tempVar.addCallback(self.tempCallback, callNow=False)
+
+    def posCallback(self, keyVar):
+        self.seen.append(('pos', keyVar.valueList))
+        if self.onPos:
+            self.onPos()
+
+    def tempCallback(self, keyVar):
+        self.seen.append(('temp', keyVar.valueList))
+
+    def test_oneCallbackPerBatch(self):
+        self.dispatcher.dispatchReplyStrBatch([
+            'other.user 0 test i temp=1',
+            'other.user 0 test i pos=1,2',
+            'other.user 0 test i temp=2',
+        ])
+        self.assertEqual(self.seen, [('pos', (1.0, 2.0)), ('temp', (2.0,))])
+
+    def test_afterCmdCallbacks(self):
+        """Grouped callbacks are issued after the command callbacks for the batch"""
+        def cmdCallback(cmdVar):
+            self.seen.append((cmdVar.cmdStr, str(cmdVar.lastCode), self.tempVar.valueList))
+        cmdVar = keyvar.CmdVar(actor='test', cmdStr='cmd', callFunc=cmdCallback, callCodes=keyvar.AllCodes)
+        self.dispatcher.executeCmd(cmdVar)
+        self.dispatcher.dispatchReplyStrBatch([
+            'me.me 1 test > ',
+            'other.user 0 test i temp=1',
+            'me.me 1 test i text="temp set"',
+            'me.me 1 test w text="still pending at the end of the batch"',
+        ])
+        self.assertEqual(self.seen, [
+            ('cmd', '>', (None,)),
+            ('cmd', 'I', (1.0,)),
+            ('cmd', 'W', (1.0,)),
+            ('temp', (1.0,)),
+        ])
+
+    def test_nestedBatch(self):
+        """A callback that dispatches a batch while a batch is being dispatched"""
+        def dispatchNested():
+            self.onPos = None
+            self.dispatcher.dispatchReplyStrBatch(['other.user 0 test i temp=2'])
+        self.onPos = dispatchNested
+        self.dispatcher.dispatchReplyStrBatch([
+            'other.user 0 test i temp=1',
+            'other.user 0 test i pos=1,2',
+            'other.user 0 test i temp=3',
+        ])
+        self.assertEqual(self.seen, [('pos', (1.0, 2.0)), ('temp', (3.0,))])
+        self.assertIsNone(self.dispatcher._dirtyKeyVars)
+
+class TestAddKeyVar(unittest.TestCase):
+
+    def test_refreshCmdSetDirectly(self):
+        """A refresh command assigned directly to the KeyVar is registered"""
+        dispatcher = cmdkeydispatcher.CmdKeyVarDispatcher()
+        keyVar = keyvar.KeyVar('test', protoKeys.Key('a', protoTypes.Int()))
+        self.assertFalse(keyVar.hasRefreshCmd)
+        keyVar.refreshActor = 'test'
+        keyVar.refreshCmd = 'status'
+        self.assertTrue(keyVar.hasRefreshCmd)
+        dispatcher.addKeyVar(keyVar)
+        self.assertEqual(dispatcher.refreshCmdDict, {('test', 'status'): set([keyVar])})
+        keyVar.refreshCmd = None
+        self.assertFalse(keyVar.hasRefreshCmd)
+
+class TestRefreshAllVar(unittest.TestCase):
+
+    def test_resetAllBeforeCallbacks(self):
+        """Callbacks see every KeyVar already reset"""
+        dispatcher = cmdkeydispatcher.CmdKeyVarDispatcher()
+        keyVars = [keyvar.KeyVar('test', protoKeys.Key(name, protoTypes.Int())) for name in ('a', 'b')]
+        dispatcher.addKeyVars(keyVars)
+        dispatcher.dispatchReplyStr('other.user 0 test i a=1; b=2')
+        seen = []
+        def callback(keyVar):
+            seen.append((keyVar.name, [kv.isCurrent for kv in keyVars]))
+        for keyVar in keyVars:
+            self.assertTrue(keyVar.isCurrent)
+            keyVar.addCallback(callback, callNow=False)
+        dispatcher.refreshAllVar()
+        self.assertEqual(seen, [('a', [False, False]), ('b', [False, False])])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import opscore.utility.config as config
+
+class BrokenConfig(config.ProductConfig):
+    """A config whose broken options are defined but cannot be read"""
+
+    def getValue(self, optionName, getType=None):
+        if optionName.startswith('broken'):
+            raise config.ConfigError()
+        return config.ProductConfig.getValue(self, optionName, getType)
+
+class TestOptionDefaults(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.tempDir, 'config.ini')
+        with open(self.fileName, 'w') as iniFile:
+            iniFile.write('[test]\nbroken = 1\nbroken2 = 1\nalias = 2\nverbose = true\n')
+        self.parser = config.ConfigOptionParser(config_file=self.fileName, config_section='test')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def test_defaults(self):
+        self.parser.add_option('-a', '--other', '--alias', dest='a', default='0')
+        self.parser.add_option('--missing', dest='m', default='0')
+        self.parser.add_option('--verbose', action='store_true', dest='v')
+        self.assertEqual(self.parser.defaults, {'a': '2', 'm': '0', 'v': True})
+
+    def test_unreadableAlias(self):
+        """An option whose value cannot be read falls through to the next alias"""
+        self.parser.configOptions = BrokenConfig(None, self.fileName, 'test')
+        self.parser.add_option('--broken', '--alias', dest='a', default='0')
+        self.parser.add_option('--broken2', dest='b', default='0')
+        self.assertEqual(self.parser.defaults, {'a': '2', 'b': '0'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import contextlib
+import io
+import unittest
+
+import opscore.protocols.keys as protoKeys
+import opscore.protocols.messages as protoMess
+import opscore.protocols.types as protoTypes
+
+class TestTypedValuesConsume(unittest.TestCase):
+    """The one-pass consume paths must give the same results as the general consume."""
+
+    def generalTypedValues(self, *vtypes):
+        typedValues = protoKeys.TypedValues(vtypes)
+        typedValues._valueClasses = None
+        typedValues._repeatedType = None
+        return typedValues
+
+    def assertSameConsume(self, vtypes, values, didConsume):
+        typedValues = protoKeys.TypedValues(vtypes)
+        generalTypedValues = self.generalTypedValues(*vtypes)
+        fastValues = list(values)
+        generalValues = list(values)
+        self.assertEqual(typedValues.consume(fastValues), didConsume)
+        self.assertEqual(generalTypedValues.consume(generalValues), didConsume)
+        self.assertEqual(fastValues, generalValues)
+        self.assertEqual([type(value) for value in fastValues], [type(value) for value in generalValues])
+        if not didConsume:
+            self.assertEqual(fastValues, values)
+        return fastValues
+
+    def test_paths(self):
+        self.assertIsNotNone(protoKeys.TypedValues([protoTypes.Float()*3])._valueClasses)
+        self.assertIsNotNone(protoKeys.TypedValues([protoTypes.String(), protoTypes.Int()*2])._valueClasses)
+        self.assertIsNotNone(protoKeys.TypedValues([protoTypes.Int()*(1,3)])._repeatedType)
+        self.assertIsNotNone(protoKeys.TypedValues([protoTypes.Int()*(2,)])._repeatedType)
+
+    def test_repeated(self):
+        for vtype in (protoTypes.Float()*3, protoTypes.Int()*(1,3), protoTypes.Int()*(2,)):
+            for values in (['1', '2'], ['1', '2', '3'], ['1', '2', '3', '4'], ['1'], []):
+                nValues = len(values)
+                didConsume = nValues >= vtype.minRepeat and (vtype.maxRepeat is None or nValues <= vtype.maxRepeat)
+                self.assertSameConsume([vtype], values, didConsume)
+
+    def test_mixed(self):
+        vtypes = [protoTypes.String(), protoTypes.Int()*2, protoTypes.Float()]
+        values = self.assertSameConsume(vtypes, ['a', '1', '2', '3.5'], True)
+        self.assertEqual(values, ['a', 1, 2, 3.5])
+        self.assertSameConsume(vtypes, ['a', '1', '2'], False)
+        self.assertSameConsume(vtypes, ['a', '1', '2', '3.5', '4'], False)
+
+    def test_alreadyTyped(self):
+        vtypes = [protoTypes.String(), protoTypes.Int()*2]
+        values = self.assertSameConsume(vtypes, ['a', '1', '2'], True)
+        typedValues = protoKeys.TypedValues(vtypes)
+        self.assertTrue(typedValues.needsCoercion(['a', '1', '2']))
+        self.assertFalse(typedValues.needsCoercion(values))
+        self.assertEqual(self.assertSameConsume(vtypes, values, True), values)
+        vtypes = [protoTypes.Float()*(1,3)]
+        values = self.assertSameConsume(vtypes, ['1', '2'], True)
+        self.assertEqual(self.assertSameConsume(vtypes, values, True), values)
+
+    def test_invalid(self):
+        vtype = protoTypes.Float(invalid='NaN')
+        for vtypes in ([vtype*2], [vtype*(1,3)], [protoTypes.String(), vtype]):
+            values = self.assertSameConsume(vtypes, ['1', 'nan'], True)
+            self.assertIs(values[-1], protoTypes.InvalidValue)
+        self.assertSameConsume([protoTypes.Int()*2], ['1', 'x'], False)
+        self.assertSameConsume([protoTypes.Int()*(1,3)], ['1', 'x'], False)
+        self.assertSameConsume([protoTypes.String(), protoTypes.Int()], ['a', 'x'], False)
+
+class TestKeyCreate(unittest.TestCase):
+
+    def test_create(self):
+        key = protoKeys.Key('pos', protoTypes.String(), protoTypes.Float()*2)
+        keyword = key.create('a', '1', '2')
+        self.assertEqual(keyword.values, ['a', 1.0, 2.0])
+        self.assertEqual(tuple(type(value) for value in keyword.values), key.typedValues._valueClasses)
+        self.assertTrue(keyword.matched)
+        typedKeyword = key.create(keyword.values)
+        self.assertEqual(typedKeyword.values, keyword.values)
+        self.assertEqual([type(value) for value in typedKeyword.values], [type(value) for value in keyword.values])
+        self.assertTrue(typedKeyword.matched)
+        self.assertRaises(protoKeys.KeysError, key.create, 'a', 'x', '2')
+        self.assertRaises(protoKeys.KeysError, key.create, 'a', '1')
+
+class TestConsumerDebug(unittest.TestCase):
+
+    def tearDown(self):
+        protoKeys.Consumer.setDebug(False)
+        protoKeys.Key.debug = False
+
+    def consumeOutput(self, key):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertTrue(key.consume(protoMess.Keyword('a', ['1'])))
+        return out.getvalue()
+
+    def test_setDebug(self):
+        key = protoKeys.Key('a', protoTypes.Int())
+        self.assertFalse(key.debug)
+        self.assertEqual(self.consumeOutput(key), '')
+        protoKeys.Consumer.setDebug(True)
+        self.assertTrue(protoKeys.Consumer.debug)
+        self.assertIn('PASS', self.consumeOutput(key))
+        protoKeys.Consumer.setDebug(False)
+        self.assertEqual(self.consumeOutput(key), '')
+
+    def test_debugAttribute(self):
+        """Setting debug on a class or instance works as it did when the flag was tested per call"""
+        key = protoKeys.Key('a', protoTypes.Int())
+        protoKeys.Consumer.debug = True
+        self.assertTrue(key.debug)
+        self.assertEqual(self.consumeOutput(key).count('PASS'), 2)
+        protoKeys.Consumer.debug = False
+        self.assertFalse(key.debug)
+        self.assertEqual(self.consumeOutput(key), '')
+        protoKeys.Key.debug = True
+        self.assertFalse(protoKeys.Consumer.debug)
+        self.assertEqual(self.consumeOutput(key).count('PASS'), 1)
+        protoKeys.Key.debug = False
+        key.debug = True
+        self.assertEqual(self.consumeOutput(key).count('PASS'), 1)
+        self.assertEqual(self.consumeOutput(protoKeys.Key('a', protoTypes.Int())), '')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+import opscore.protocols.messages as protoMess
+
+class TestKeywordsLookup(unittest.TestCase):
+    """Lookup by name must see every change to a Keywords list."""
+
+    def setUp(self):
+        self.keywords = protoMess.Keywords([protoMess.Keyword('a', [1]), protoMess.Keyword('B', [2])])
+        # build the name index
+        self.assertIs(self.keywords['b'], self.keywords[1])
+
+    def assertNames(self, names):
+        keywords = self.keywords
+        for name in names:
+            self.assertIn(name, keywords)
+            self.assertIs(keywords[name], [kw for kw in keywords if kw.lowerName == name.lower()][0])
+        for name in set(['a', 'b', 'c', 'd']) - set(name.lower() for name in names):
+            self.assertNotIn(name, keywords)
+            self.assertRaises(KeyError, keywords.__getitem__, name)
+
+    def test_append(self):
+        self.keywords.append(protoMess.Keyword('c'))
+        self.assertNames(['a', 'b', 'c'])
+
+    def test_insert(self):
+        self.keywords.insert(0, protoMess.Keyword('C'))
+        self.assertNames(['a', 'b', 'c'])
+
+    def test_setSlice(self):
+        self.keywords[1:] = [protoMess.Keyword('c'), protoMess.Keyword('d')]
+        self.assertNames(['a', 'c', 'd'])
+
+    def test_setItem(self):
+        self.keywords[0] = protoMess.Keyword('c')
+        self.assertNames(['b', 'c'])
+
+    def test_del(self):
+        del self.keywords[0]
+        self.assertNames(['b'])
+        del self.keywords[:]
+        self.assertNames([])
+
+    def test_iadd(self):
+        keywords = self.keywords
+        keywords += [protoMess.Keyword('c')]
+        self.assertIs(keywords, self.keywords)
+        self.assertNames(['a', 'b', 'c'])
+
+    def test_otherMutators(self):
+        keywords = self.keywords
+        keywords.extend([protoMess.Keyword('c')])
+        self.assertNames(['a', 'b', 'c'])
+        keywords.pop()
+        self.assertNames(['a', 'b'])
+        keywords.remove(keywords['a'])
+        self.assertNames(['b'])
+        keywords.clear()
+        self.assertNames([])
+        keywords.copy(protoMess.Keywords([protoMess.Keyword('d')]))
+        self.assertNames(['d'])
+
+    def test_duplicateNames(self):
+        """Lookup by name returns the first keyword with that name"""
+        first = protoMess.Keyword('c', [1])
+        second = protoMess.Keyword('C', [2])
+        self.keywords.extend([first, second])
+        self.assertIs(self.keywords['c'], first)
+        self.keywords.reverse()
+        self.assertIs(self.keywords['c'], second)
+        self.keywords.sort(key=lambda kw: kw.values[0] if kw.lowerName == 'c' else 0)
+        self.assertIs(self.keywords['C'], first)
+        self.keywords.remove(first)
+        self.assertIs(self.keywords['c'], second)
+
+if __name__ == '__main__':
+    unittest.main()
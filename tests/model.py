@@ -0,0 +1,49 @@
+import unittest
+
+import opscore.protocols.keys as protoKeys
+import opscore.protocols.types as protoTypes
+import opscore.actor.keyvar as keyvar
+import opscore.actor.cmdkeydispatcher as cmdkeydispatcher
+import opscore.actor.model as model
+
+class TestModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        if model.Model.dispatcher is None:
+            model.Model.setDispatcher(cmdkeydispatcher.CmdKeyVarDispatcher())
+        cls._load = protoKeys.KeysDictionary.load
+        protoKeys.KeysDictionary.load = staticmethod(lambda actor: protoKeys.KeysDictionary(
+            actor, (1, 0), protoKeys.Key('a', protoTypes.Int()), protoKeys.Key('b', protoTypes.Int())))
+
+    @classmethod
+    def tearDownClass(cls):
+        protoKeys.KeysDictionary.load = cls._load
+
+    def test_keyVarDict(self):
+        testModel = model.Model('modeltest1')
+        self.assertEqual(sorted(testModel.keyVarDict), ['a', 'b'])
+        synth = keyvar.KeyVar('modeltest1', protoKeys.Key('synth', protoTypes.Int()))
+        testModel.synth = synth
+        self.assertIs(testModel.keyVarDict['synth'], synth)
+        testModel.synth = None
+        self.assertEqual(sorted(testModel.keyVarDict), ['a', 'b'])
+        testModel.synth = synth
+        del testModel.synth
+        self.assertEqual(sorted(testModel.keyVarDict), ['a', 'b'])
+        testModel.keyVarDict.clear()
+        self.assertEqual(sorted(testModel.keyVarDict), ['a', 'b'])
+
+    def test_setBeforeInit(self):
+        """A subclass may set attributes, including keyVars, before calling Model.__init__"""
+        class TestModel(model.Model):
+            def __init__(self, actor):
+                self.early = keyvar.KeyVar(actor, protoKeys.Key('early', protoTypes.Int()))
+                self.note = 'set before Model.__init__'
+                del self.note
+                model.Model.__init__(self, actor)
+        testModel = TestModel('modeltest2')
+        self.assertEqual(sorted(testModel.keyVarDict), ['a', 'b', 'early'])
+
+if __name__ == '__main__':
+    unittest.main()
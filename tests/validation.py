@@ -0,0 +1,199 @@
+import contextlib
+import io
+import unittest
+
+import opscore.protocols.keys as protoKeys
+import opscore.protocols.messages as protoMess
+import opscore.protocols.types as protoTypes
+import opscore.protocols.parser as protoParse
+import opscore.protocols.validation as validation
+
+class ValidationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.keysDict = protoKeys.KeysDictionary('validationtest', (1, 0),
+            protoKeys.Key('time', protoTypes.Float()),
+            protoKeys.Key('n', protoTypes.Int()),
+            protoKeys.Key('r'),
+        )
+        protoKeys.CmdKey.setKeys(self.keysDict)
+        self.parser = protoParse.CommandParser()
+
+    def tearDown(self):
+        protoKeys.CmdKey.keys = {}
+
+class TestConsumerCache(ValidationTestCase):
+
+    def test_sharedFormat(self):
+        """Cmds that share a parsed format validate independently"""
+        cmd1 = validation.Cmd('x', '<n> [<time>] [r]')
+        cmd2 = validation.Cmd('y', '<n> [<time>] [r]')
+        self.assertIs(cmd1.consumer, cmd2.consumer)
+        # cmd1 fails part way through its keywords, which must not affect cmd2
+        message = self.parser.parse('x n=2 time=1 bad')
+        self.assertFalse(cmd1.consume(message))
+        self.assertEqual([kw.values for kw in message.keywords], [['2'], ['1'], []])
+        message = self.parser.parse('y n=3 time=abc')
+        self.assertFalse(cmd2.consume(message))
+        message = self.parser.parse('y n=3 r time=1.5')
+        self.assertTrue(cmd2.consume(message))
+        self.assertEqual(message.keywords['time'].values, [1.5])
+        self.assertEqual(message.keywords['n'].values, [3])
+        message = self.parser.parse('x n=4')
+        self.assertTrue(cmd1.consume(message))
+        self.assertEqual(message.keywords['n'].values, [4])
+
+    def test_keysChange(self):
+        """The cache is emptied when the registered keys dictionaries change"""
+        cmd1 = validation.Cmd('x', '<n>')
+        protoKeys.CmdKey.setKeys(protoKeys.KeysDictionary('validationtest2', (1, 0),
+            protoKeys.Key('n', protoTypes.String())))
+        cmd2 = validation.Cmd('x', '<n>')
+        self.assertIsNot(cmd1.consumer, cmd2.consumer)
+        self.assertEqual(list(validation.Cmd._consumerCache), ['<n>'])
+        message = self.parser.parse('x n=abc')
+        self.assertFalse(cmd1.consume(message))
+        self.assertTrue(cmd2.consume(message))
+        protoKeys.CmdKey.addKeys(self.keysDict)
+        self.assertIsNot(validation.Cmd('x', '<n>').consumer, cmd2.consumer)
+
+class TestValidate(ValidationTestCase):
+    """Cmd.consume and Cmd.match accept and reject the same commands"""
+
+    def setUp(self):
+        ValidationTestCase.setUp(self)
+        self.called = []
+        self.cmd = validation.Cmd('x', '<n> <time> [r]') >> self.called.append
+
+    def check(self, line, didMatch, keywordValues):
+        """Check consume and match on a fresh parse of line
+
+        keywordValues is the list of keyword values expected afterwards:
+        typed if the command matched, else as parsed.
+        """
+        for method in ('consume', 'match'):
+            del self.called[:]
+            message = self.parser.parse(line)
+            result = getattr(self.cmd, method)(message)
+            if method == 'consume':
+                self.assertEqual(result, didMatch)
+                self.assertEqual(self.called, [message] if didMatch else [])
+            elif didMatch:
+                self.assertEqual(result, (message, [self.called.append]))
+                self.assertEqual(self.called, [])
+            else:
+                self.assertFalse(result)
+            self.assertEqual([kw.values for kw in message.keywords], keywordValues)
+            # a keyword is left as parsed (strings) unless the command matched
+            for kw in message.keywords:
+                for value in kw.values:
+                    self.assertEqual(isinstance(value, str), not didMatch)
+
+    def test_fullMatch(self):
+        self.check('x n=2 time=1.5', True, [[2], [1.5]])
+        self.check('x n=2 time=1.5 r', True, [[2], [1.5], []])
+
+    def test_partialMatch(self):
+        """The keywords are restored if only some of them match"""
+        # n is converted before time fails
+        self.check('x n=2 time=abc', False, [['2'], ['abc']])
+        # every keyword in the format matches, but one is left over
+        self.check('x n=2 time=1.5 bad', False, [['2'], ['1.5'], []])
+
+    def test_rejection(self):
+        self.check('y n=2 time=1.5', False, [['2'], ['1.5']])
+        self.check('x n=2', False, [['2']])
+        self.check('x', False, [])
+        self.assertFalse(self.cmd.consume(protoMess.Keyword('x')))
+        self.assertFalse(self.cmd.match(protoMess.Keyword('x')))
+
+    def test_noFormat(self):
+        cmd = validation.Cmd('x', protoTypes.Int(), '')
+        for method in (cmd.consume, cmd.match):
+            message = self.parser.parse('x 3')
+            self.assertTrue(method(message))
+            self.assertEqual(message.values, [3])
+            self.assertFalse(method(self.parser.parse('x 3 n=2')))
+            self.assertFalse(method(self.parser.parse('x')))
+
+    def test_trace(self):
+        """Every traced step reports a pass or failure, for match as well as consume"""
+        protoKeys.Consumer.setDebug(True)
+        try:
+            for line in ('x n=2 time=1.5', 'x n=2 time=abc'):
+                for method in (self.cmd.consume, self.cmd.match):
+                    out = io.StringIO()
+                    with contextlib.redirect_stdout(out):
+                        method(self.parser.parse(line))
+                    lines = out.getvalue().splitlines()
+                    self.assertEqual(len([line for line in lines if ' << ' in line]),
+                        len([line for line in lines if 'PASS >> ' in line or 'FAIL: ' in line]))
+                    self.assertTrue(lines[-1].startswith(('PASS', 'FAIL')))
+        finally:
+            protoKeys.Consumer.setDebug(False)
+
+class TestCandidates(ValidationTestCase):
+    """CommandHandler only skips Cmds that could never accept a command"""
+
+    def setUp(self):
+        ValidationTestCase.setUp(self)
+        self.called = []
+        self.cmds = [
+            validation.Cmd('x', '<n> [<time>] [r]'),
+            validation.Cmd('x', '@(r|n) [<time>]'),
+            validation.Cmd('x', 'a|b'),
+            validation.Cmd('x', ''),
+        ]
+        for cmd in self.cmds:
+            cmd >> (lambda message, cmd=cmd: self.called.append(cmd))
+        self.handler = validation.CommandHandler(*self.cmds)
+
+    def firstMatch(self, line):
+        """Return the first Cmd that validates line, trying every Cmd in turn"""
+        for cmd in self.cmds:
+            if cmd.match(self.parser.parse(line)):
+                return cmd
+        return None
+
+    def test_keywordNames(self):
+        self.assertEqual([cmd.keywordNames for cmd in self.cmds], [
+            frozenset(['n', 'time', 'r']),
+            frozenset(['n', 'time', 'r']),
+            frozenset(['a', 'b']),
+            frozenset(),
+        ])
+
+    def test_candidates(self):
+        cmds = self.cmds
+        for line, candidates in (
+            ('x', cmds),
+            ('x n=1', cmds[:2]),
+            ('x r time=1', cmds[:2]),
+            ('x N=1 TIME=2', cmds[:2]),
+            ('x b', cmds[2:3]),
+            ('x a b', cmds[2:3]),
+            ('x n=1 a', []),
+            ('x bad', []),
+        ):
+            self.assertEqual(self.handler.candidates(self.parser.parse(line)), candidates, line)
+
+    def test_consumeLine(self):
+        """The handler picks the same Cmd as trying every Cmd in turn"""
+        for line in ('x', 'x n=1', 'x n=1 time=2', 'x time=2 n=1', 'x r time=2', 'x N=1 R',
+                'x n=1 r', 'x a', 'x B', 'x a b', 'x bad', 'x n=1 a', 'y'):
+            expected = self.firstMatch(line)
+            for method in (self.handler.consumeLine, self.handler.matchLine):
+                del self.called[:]
+                message = self.parser.parse(line)
+                if expected is None:
+                    self.assertRaises(validation.ValidationError, method, message)
+                    continue
+                result = method(message)
+                if method == self.handler.consumeLine:
+                    self.assertEqual(self.called, [expected], line)
+                else:
+                    self.assertEqual(result, (message, expected.callbacks), line)
+                    self.assertEqual(self.called, [], line)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import opscore.protocols.types as protoTypes
+
+class TestEnum(unittest.TestCase):
+
+    def setUp(self):
+        self.Enum = protoTypes.Enum('Idle', 'Busy', 'busy', 0, False, name='state')
+
+    def test_labels(self):
+        self.assertEqual(self.Enum.enumLabels, ('Idle', 'Busy', 'busy', '0', 'False'))
+        self.assertEqual(self.Enum.enumValues, {'Idle': 0, 'Busy': 1, 'busy': 2, '0': 3, 'False': 4})
+
+    def test_byLabel(self):
+        for value, label in (('Idle', 'Idle'), ('idle', 'Idle'), ('IDLE', 'Idle'), (''.join(['Bu', 'sy']), 'Busy'),
+                             ('false', 'False'), ('0', '0')):
+            enum = self.Enum(value)
+            self.assertEqual(str.__str__(enum), label)
+            self.assertEqual(enum, value)
+        # with labels that differ only in case, the first one wins
+        self.assertEqual(str.__str__(self.Enum('busy')), 'Busy')
+        self.assertEqual(self.Enum('idle').storageValue(), '0')
+
+    def test_byIndex(self):
+        for index, label in enumerate(self.Enum.enumLabels):
+            self.assertEqual(str.__str__(self.Enum(index)), label)
+        self.assertRaises(ValueError, self.Enum, 5)
+        self.assertRaises(ValueError, self.Enum, -1)
+
+    def test_unknownLabel(self):
+        for value in ('Unknown', 'Idl', '', '1'):
+            self.assertRaises(ValueError, self.Enum, value)
+
+class TestBool(unittest.TestCase):
+
+    def setUp(self):
+        self.Bool = protoTypes.Bool('F', 'T')
+
+    def test_labels(self):
+        # the values are compared to non-interned strings such as parsed values
+        for value, expected in ((''.join(['T']), True), (''.join(['F']), False), ('T', True), ('F', False),
+                                (True, True), (False, False), (1, True), (0, False)):
+            boolValue = self.Bool(value)
+            self.assertEqual(bool(boolValue), expected)
+            self.assertEqual(str(boolValue), 'T' if expected else 'F')
+
+    def test_invalid(self):
+        for value in ('t', 'True', '', 2):
+            self.assertRaises(ValueError, self.Bool, value)
+
+if __name__ == '__main__':
+    unittest.main()